@@ -0,0 +1,122 @@
+import gzip
+from typing import List, Optional
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+COMPRESSIBLE_TYPES = ("application/json", "text/")
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Pick the best encoding we support from an Accept-Encoding header, honouring q-values.
+    Brotli wins ties with gzip since it compresses JSON noticeably better.
+    """
+    preferences = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if coding:
+            preferences[coding] = quality
+
+    supported: List[str] = ["br", "gzip"] if BROTLI_AVAILABLE else ["gzip"]
+    wildcard = preferences.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for coding in supported:
+        quality = preferences.get(coding, wildcard)
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+def compress(body: bytes, encoding: str, level: int) -> bytes:
+    if encoding == "br":
+        # Brotli quality runs 0-11; map the gzip-style 1-9 level onto it
+        return brotli.compress(body, quality=min(11, level + 2))
+    return gzip.compress(body, compresslevel=level)
+
+def weaken_etag(headers: MutableHeaders):
+    """
+    Mark the ETag weak: each content-coding of a resource needs its own strong
+    validator, so a compressed body can't share the identity body's one
+    """
+    etag = headers.get("etag")
+    if etag and not etag.startswith("W/"):
+        headers["ETag"] = f"W/{etag}"
+
+class CompressionMiddleware:
+    """
+    Negotiated gzip/brotli compression for complete JSON and text responses
+    of at least minimum_size bytes. Streaming responses are passed through.
+    Compressed responses, and 304s to clients that accept compression, get a weak ETag.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, level: int = 5):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.level = level
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[Message] = None
+        passthrough = False
+
+        async def send_compressed(message: Message):
+            nonlocal start_message, passthrough
+            if message["type"] == "http.response.start":
+                if message["status"] == 304:
+                    # The client may hold the compressed body, so answer with its validator
+                    weaken_etag(MutableHeaders(raw=message["headers"]))
+                    await send(message)
+                    passthrough = True
+                    return
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                passthrough = (
+                    "content-encoding" in headers
+                    or not content_type.startswith(COMPRESSIBLE_TYPES)
+                )
+                if passthrough:
+                    await send(message)
+                else:
+                    # Hold the headers until we know whether the body gets compressed
+                    start_message = message
+                return
+
+            if passthrough or start_message is None:
+                await send(message)
+                return
+
+            headers = MutableHeaders(raw=start_message["headers"])
+            headers.add_vary_header("Accept-Encoding")
+            body = message.get("body", b"")
+            if not message.get("more_body", False) and len(body) >= self.minimum_size:
+                body = compress(body, encoding, self.level)
+                headers["Content-Encoding"] = encoding
+                weaken_etag(headers)
+                headers["Content-Length"] = str(len(body))
+                message = {**message, "body": body}
+
+            await send(start_message)
+            start_message = None
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
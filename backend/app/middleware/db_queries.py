@@ -0,0 +1,22 @@
+from fastapi import Request
+from ..services import db_instrumentation
+
+async def track_queries(request: Request, call_next):
+    """
+    Count the database queries a request makes, warn when it exceeds
+    DB_QUERY_BUDGET, and report the totals in a Server-Timing header
+    """
+    queries = db_instrumentation.RequestQueries()
+    token = db_instrumentation.current_request.set(queries)
+    try:
+        response = await call_next(request)
+    finally:
+        db_instrumentation.current_request.reset(token)
+
+    if queries.count > db_instrumentation.QUERY_BUDGET:
+        print(
+            f"Query budget exceeded: {request.method} {request.url.path} made "
+            f"{queries.count} queries (budget {db_instrumentation.QUERY_BUDGET})"
+        )
+    response.headers["Server-Timing"] = f'db;dur={queries.total_ms:.1f};desc="{queries.count} queries"'
+    return response
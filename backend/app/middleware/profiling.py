@@ -0,0 +1,36 @@
+from fastapi import Request
+from ..services import profiling_service
+
+async def profile_requests(request: Request, call_next):
+    """
+    Profile the request if an admin asked for it (X-Profile + X-Profile-Token)
+    or it was picked by PROFILE_SAMPLE_RATE. The stored profile's name is
+    returned in the X-Profile-Id response header. Profiling failures are logged
+    and never change the response.
+    """
+    mode = profiling_service.choose_mode(
+        request.headers.get("x-profile"),
+        request.headers.get("x-profile-token")
+    )
+    with profiling_service.tracking_request():
+        if mode is None:
+            return await call_next(request)
+
+        try:
+            profile = profiling_service.RequestProfile(mode, request.method, request.url.path)
+            profile.start()
+        except Exception as e:
+            print(f"Could not start profiling {request.url.path}: {e}")
+            return await call_next(request)
+
+        name = None
+        try:
+            response = await call_next(request)
+        finally:
+            try:
+                name = profile.stop()
+            except Exception as e:
+                print(f"Could not save profile of {request.url.path}: {e}")
+        if name:
+            response.headers["X-Profile-Id"] = name
+        return response
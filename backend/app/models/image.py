@@ -63,4 +63,17 @@ class CommentResponse(BaseModel):
 
 class CommentsListResponse(BaseModel):
     """Response containing a list of comments"""
-    comments: List[CommentResponse] 
\ No newline at end of file
+    comments: List[CommentResponse]
+
+class UserImageStats(BaseModel):
+    """Per-user aggregate counters for the dashboard"""
+    image_count: int = 0
+    total_likes: int = 0
+    most_liked_image: Optional[ImageMetadata] = None
+
+class ImageDetailResponse(BaseModel):
+    """An image with everything its detail page needs"""
+    image: ImageMetadata
+    comments: List[CommentResponse]
+    comment_count: int
+    liked: bool = False
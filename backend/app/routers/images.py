@@ -1,14 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Header
-from typing import List, Optional
-from ..models.image import ImagePrompt, ImageResponse, ImageMetadata, LikeRequest, SaveImageRequest, UploadImageRequest, Comment, CreateCommentRequest, CommentResponse, CommentsListResponse
-from ..services import openai_service, cloudinary_service, supabase_service
+from fastapi import APIRouter, Depends, HTTPException, status, Header, Request, Response
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+from ..models.image import ImagePrompt, ImageResponse, ImageMetadata, LikeRequest, SaveImageRequest, UploadImageRequest, Comment, CreateCommentRequest, CommentResponse, CommentsListResponse, UserImageStats, ImageDetailResponse
+from ..services import openai_service, cloudinary_service, supabase_service, rate_limit_service, etag_service
 
 router = APIRouter(
     prefix="/images",
     tags=["images"]
 )
 
-@router.post("/generate", response_model=ImageResponse)
+@router.post(
+    "/generate",
+    response_model=ImageResponse,
+    dependencies=[Depends(rate_limit_service.admit("generate"))]
+)
 async def generate_image(
     image_prompt: ImagePrompt,
     user_id: str = Header(..., description="User ID from authentication")
@@ -58,7 +63,11 @@ async def generate_image(
         refined_prompt=refined_prompt
     )
 
-@router.post("/upload", response_model=dict)
+@router.post(
+    "/upload",
+    response_model=dict,
+    dependencies=[Depends(rate_limit_service.admit("upload"))]
+)
 async def upload_image(
     upload_request: UploadImageRequest,
     user_id: str = Header(..., description="User ID from authentication")
@@ -98,8 +107,8 @@ async def save_image(
             detail="Failed to save image metadata"
         )
     
-    # Get the saved image metadata
-    image = await supabase_service.get_image_by_id(image_id)
+    # Get the saved image metadata; the user's own write, so this reads from the primary
+    image = await supabase_service.get_image_by_id(image_id, user_id)
     if not image:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -110,14 +119,53 @@ async def save_image(
 
 @router.get("/user", response_model=List[ImageMetadata])
 async def get_user_images(
+    request: Request,
+    response: Response,
+    limit: int = 50,
+    cursor: Optional[str] = None,
     user_id: str = Header(..., description="User ID from authentication")
 ):
     """
-    Get all images for the current user
+    Get images for the current user, newest first, with cursor pagination
+    Parameters:
+    - limit: Number of images to return
+    - cursor: Value of the X-Next-Cursor header from the previous page
+    The X-Next-Cursor response header is set when more images are available.
+    Supports conditional requests via the user's aggregate stats version.
     """
-    images = await supabase_service.get_user_images(user_id)
+    limit = max(1, min(limit, 200))
+    not_modified = None
+
+    def is_current(version: Optional[Dict[str, Any]]) -> bool:
+        nonlocal not_modified
+        etag = etag_service.make_etag(
+            "user-images", user_id, limit, cursor,
+            *(version.values() if version else ())
+        )
+        not_modified = etag_service.check_not_modified(
+            request, response, etag,
+            last_modified=version["updated_at"] if version else None,
+            vary="user-id"
+        )
+        return not_modified is not None
+
+    images, next_cursor = await supabase_service.get_user_images(user_id, limit, cursor, is_current)
+    if not_modified:
+        return not_modified
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return images
 
+@router.get("/user/stats", response_model=UserImageStats)
+async def get_user_stats(
+    user_id: str = Header(..., description="User ID from authentication")
+):
+    """
+    Get aggregate stats for the current user's images
+    """
+    stats = await supabase_service.get_user_stats(user_id)
+    return stats
+
 @router.get("/explore", response_model=List[ImageMetadata])
 async def get_explore_images(
     limit: int = 20,
@@ -203,9 +251,10 @@ async def get_user_liked_images(
     return liked_images
 
 @router.get("/{image_id}", response_model=ImageMetadata)
-async def get_image_by_id(image_id: str):
+async def get_image_by_id(image_id: str, request: Request, response: Response):
     """
     Get a single image by ID
+    Supports conditional requests; the ETag tracks the row's likes and owner name.
     """
     image = await supabase_service.get_image_by_id(image_id)
     
@@ -214,16 +263,71 @@ async def get_image_by_id(image_id: str):
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Image not found"
         )
+
+    etag = etag_service.make_etag("image", image.id, image.created_at, image.likes, image.userName)
+    not_modified = etag_service.check_not_modified(request, response, etag)
+    if not_modified:
+        return not_modified
     
     return image
 
+@router.get("/{image_id}/detail", response_model=ImageDetailResponse)
+async def get_image_detail(
+    image_id: str,
+    request: Request,
+    response: Response,
+    comment_limit: int = 20,
+    user_id: Optional[str] = Header(None, description="User ID from authentication, if signed in")
+):
+    """
+    Get an image, its first page of comments, its comment count and whether
+    the caller liked it, in one request and one database round trip
+    """
+    comment_limit = max(1, min(comment_limit, 100))
+    detail = await supabase_service.get_image_detail(image_id, user_id, comment_limit)
+
+    if not detail:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Image not found"
+        )
+
+    image = detail.image
+    latest = detail.comments[-1].created_at if detail.comments else None
+    etag = etag_service.make_etag(
+        "detail", image.id, image.created_at, image.likes, image.userName,
+        detail.comment_count, latest, detail.liked, comment_limit
+    )
+    not_modified = etag_service.check_not_modified(request, response, etag, vary="user-id")
+    if not_modified:
+        return not_modified
+
+    return detail
+
 @router.get("/{image_id}/comments", response_model=CommentsListResponse)
-async def get_image_comments(image_id: str):
+async def get_image_comments(
+    image_id: str,
+    request: Request,
+    response: Response,
+    user_id: Optional[str] = Header(None, description="User ID from authentication, if signed in")
+):
     """
     Get all comments for an image
+    Supports conditional requests using the comment count and latest comment time.
+    Signed-in callers see their own new comments even while the read replica lags.
     """
+    not_modified = None
+
+    def is_current(count: int, latest: Optional[datetime]) -> bool:
+        nonlocal not_modified
+        etag = etag_service.make_etag("comments", image_id, count, latest)
+        not_modified = etag_service.check_not_modified(request, response, etag, last_modified=latest)
+        return not_modified is not None
+
     try:
-        comments = await supabase_service.get_image_comments(image_id)
+        comments = await supabase_service.get_image_comments(image_id, user_id, is_current)
+        if not_modified:
+            return not_modified
         return CommentsListResponse(comments=comments)
     except Exception as e:
         raise HTTPException(
@@ -0,0 +1,43 @@
+from fastapi import APIRouter, HTTPException, status, Header
+from fastapi.responses import FileResponse
+from typing import List, Optional
+from ..services import profiling_service
+
+router = APIRouter(
+    prefix="/profiles",
+    tags=["profiles"]
+)
+
+def require_admin(token: Optional[str]):
+    if not profiling_service.is_admin(token):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Profiling access requires a valid X-Profile-Token"
+        )
+
+@router.get("", response_model=List[dict])
+async def list_profiles(
+    x_profile_token: Optional[str] = Header(None)
+):
+    """
+    List stored request profiles, newest first
+    """
+    require_admin(x_profile_token)
+    return profiling_service.list_profiles()
+
+@router.get("/{name}")
+async def get_profile(
+    name: str,
+    x_profile_token: Optional[str] = Header(None)
+):
+    """
+    Download a stored profile
+    """
+    require_admin(x_profile_token)
+    path = profiling_service.get_profile_path(name)
+    if not path:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found"
+        )
+    return FileResponse(path, filename=name)
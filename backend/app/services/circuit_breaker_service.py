@@ -0,0 +1,186 @@
+import os
+import time
+import asyncio
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose breaker is open"""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Circuit '{name}' is open, retry in {retry_after:.1f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+class CircuitBreaker:
+    """
+    Tracks the outcome of recent calls to one dependency and fails fast while it is sick.
+    Opens when the failure rate or the slow-call rate over the last window_size calls
+    passes its threshold, and lets a few trial calls through after open_seconds.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        timeout: float,
+        slow_call_seconds: float,
+        failure_rate_threshold: float = 0.5,
+        slow_rate_threshold: float = 0.8,
+        window_size: int = 20,
+        min_calls: int = 5,
+        open_seconds: float = 30.0,
+        half_open_max_calls: int = 1
+    ):
+        self.name = name
+        self.timeout = timeout
+        self.slow_call_seconds = slow_call_seconds
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_rate_threshold = slow_rate_threshold
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.half_open_calls = 0
+        # (failed, slow) for each recent call
+        self.window: Deque[Tuple[bool, bool]] = deque(maxlen=window_size)
+
+    def _allow(self) -> bool:
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < self.open_seconds:
+                return False
+            self.state = HALF_OPEN
+            self.half_open_calls = 0
+        if self.state == HALF_OPEN:
+            if self.half_open_calls >= self.half_open_max_calls:
+                return False
+            self.half_open_calls += 1
+        return True
+
+    def _open(self):
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        print(f"Circuit '{self.name}' opened")
+
+    def _record(self, failed: bool, elapsed: float):
+        if self.state == OPEN:
+            # A call that started before the breaker opened; re-opening would extend the wait
+            return
+        slow = elapsed >= self.slow_call_seconds
+        if self.state == HALF_OPEN:
+            if failed or slow:
+                self._open()
+            else:
+                self.state = CLOSED
+                self.window.clear()
+                print(f"Circuit '{self.name}' closed")
+            return
+
+        self.window.append((failed, slow))
+        if len(self.window) < self.min_calls:
+            return
+        failure_rate = sum(1 for failed, _ in self.window if failed) / len(self.window)
+        slow_rate = sum(1 for _, slow in self.window if slow) / len(self.window)
+        if failure_rate >= self.failure_rate_threshold or slow_rate >= self.slow_rate_threshold:
+            self._open()
+
+    def retry_after(self) -> float:
+        return max(0.0, self.open_seconds - (time.monotonic() - self.opened_at))
+
+    async def call_async(
+        self,
+        make_call: Callable[[], Awaitable[Any]],
+        is_failure: Callable[[Exception], bool] = lambda e: True
+    ) -> Any:
+        """
+        Await make_call() under this breaker's timeout.
+        Raises CircuitOpenError without calling it while the breaker is open.
+        Errors for which is_failure returns False (e.g. the caller's own bad
+        request) are re-raised without counting against the breaker.
+        """
+        if not self._allow():
+            raise CircuitOpenError(self.name, self.retry_after())
+
+        started = time.monotonic()
+        try:
+            result = await asyncio.wait_for(make_call(), self.timeout)
+        except asyncio.CancelledError:
+            # Cancelled by the caller (e.g. a losing hedge), not the dependency's fault
+            if self.state == HALF_OPEN:
+                self.half_open_calls -= 1
+            raise
+        except Exception as e:
+            self._record(is_failure(e), time.monotonic() - started)
+            raise
+        self._record(False, time.monotonic() - started)
+        return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        calls = len(self.window)
+        return {
+            "state": self.state,
+            "recent_calls": calls,
+            "failure_rate": round(sum(1 for failed, _ in self.window if failed) / calls, 2) if calls else 0.0,
+            "slow_rate": round(sum(1 for _, slow in self.window if slow) / calls, 2) if calls else 0.0,
+            "retry_after": round(self.retry_after(), 1) if self.state == OPEN else 0.0,
+        }
+
+async def hedged(
+    make_call: Callable[[], Awaitable[Any]],
+    delay: float,
+    max_attempts: int = 2
+) -> Any:
+    """
+    Run an idempotent call, starting another attempt each time delay passes without
+    a result. Returns the first successful result and cancels the other attempts;
+    raises the last error if every attempt fails.
+    """
+    pending = set()
+    last_error: Optional[BaseException] = None
+    try:
+        pending.add(asyncio.ensure_future(make_call()))
+        attempts = 1
+        while pending:
+            timeout = delay if attempts < max_attempts else None
+            done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                last_error = task.exception()
+            # Hedge on a slow attempt, or replace a failed one while attempts remain
+            if attempts < max_attempts and (not done or not pending):
+                pending.add(asyncio.ensure_future(make_call()))
+                attempts += 1
+        raise last_error
+    finally:
+        for task in pending:
+            task.cancel()
+
+breakers: Dict[str, CircuitBreaker] = {
+    "openai": CircuitBreaker(
+        "openai",
+        timeout=float(os.getenv("OPENAI_TIMEOUT", "60")),
+        slow_call_seconds=float(os.getenv("OPENAI_SLOW_CALL_SECONDS", "45")),
+    ),
+    "cloudinary": CircuitBreaker(
+        "cloudinary",
+        timeout=float(os.getenv("CLOUDINARY_TIMEOUT", "30")),
+        slow_call_seconds=float(os.getenv("CLOUDINARY_SLOW_CALL_SECONDS", "15")),
+    ),
+    "image_download": CircuitBreaker(
+        "image_download",
+        timeout=float(os.getenv("IMAGE_DOWNLOAD_TIMEOUT", "20")),
+        slow_call_seconds=float(os.getenv("IMAGE_DOWNLOAD_SLOW_CALL_SECONDS", "10")),
+    ),
+}
+
+def get_breaker(name: str) -> CircuitBreaker:
+    return breakers[name]
+
+def snapshot() -> Dict[str, Dict[str, Any]]:
+    """State of every breaker, for /health"""
+    return {name: breaker.snapshot() for name, breaker in breakers.items()}
@@ -0,0 +1,135 @@
+import os
+import time
+import asyncio
+from typing import Any, Dict, Optional
+from . import supabase_service, cloudinary_service
+from .rate_limit_service import TokenBucket
+
+CLEANUP_ENABLED = os.getenv("CLEANUP_ENABLED", "true").lower() == "true"
+INTERVAL_SECONDS = float(os.getenv("CLEANUP_INTERVAL_SECONDS", "60"))
+# The Admin API accepts at most 100 public IDs per bulk delete
+BATCH_SIZE = min(int(os.getenv("CLEANUP_BATCH_SIZE", "100")), 100)
+# Cloudinary's Admin API is rate limited per hour, so cap our bulk deletes
+BATCHES_PER_MINUTE = float(os.getenv("CLEANUP_BATCHES_PER_MINUTE", "5"))
+COMMENT_BATCH_SIZE = int(os.getenv("CLEANUP_COMMENT_BATCH_SIZE", "500"))
+DELETED_IMAGE_BATCH_SIZE = int(os.getenv("CLEANUP_DELETED_IMAGE_BATCH_SIZE", "100"))
+# The full orphaned-comment scan reads the whole "Comment" table, so it runs rarely
+ORPHAN_SCAN_INTERVAL_SECONDS = float(os.getenv("CLEANUP_ORPHAN_SCAN_HOURS", "24")) * 3600
+LEASE_SECONDS = 300
+MAX_BACKOFF_SECONDS = 3600
+
+class CleanupMetrics:
+    def __init__(self):
+        self.runs = 0
+        self.batches = 0
+        self.assets_deleted = 0
+        self.assets_failed = 0
+        self.comments_deleted = 0
+        self.last_run_at: Optional[float] = None
+        self.last_orphan_scan_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.backlog: Dict[str, int] = {}
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "runs": self.runs,
+            "batches": self.batches,
+            "assets_deleted": self.assets_deleted,
+            "assets_failed": self.assets_failed,
+            "comments_deleted": self.comments_deleted,
+            "seconds_since_last_run": round(time.time() - self.last_run_at, 1) if self.last_run_at else None,
+            "seconds_since_orphan_scan": round(time.time() - self.last_orphan_scan_at, 1) if self.last_orphan_scan_at else None,
+            "last_error": self.last_error,
+            **self.backlog,
+        }
+
+metrics = CleanupMetrics()
+_budget = TokenBucket(BATCHES_PER_MINUTE, BATCHES_PER_MINUTE)
+_task: Optional[asyncio.Task] = None
+
+async def drain_assets():
+    """
+    Bulk-delete queued Cloudinary assets until the queue or the rate budget runs out
+    """
+    while _budget.try_acquire() == 0:
+        entries = await asyncio.to_thread(supabase_service.claim_cleanup_batch, BATCH_SIZE, LEASE_SECONDS)
+        if not entries:
+            return
+        metrics.batches += 1
+
+        public_ids = [entry["public_id"] for entry in entries]
+        try:
+            results = await cloudinary_service.delete_images(public_ids)
+            error = "Asset was not deleted"
+        except Exception as e:
+            results = {}
+            error = str(e) or type(e).__name__
+            metrics.last_error = error
+
+        done = [entry["id"] for entry in entries if results.get(entry["public_id"])]
+        failed = [entry["id"] for entry in entries if not results.get(entry["public_id"])]
+        await asyncio.to_thread(supabase_service.complete_cleanup_entries, done)
+        await asyncio.to_thread(supabase_service.retry_cleanup_entries, failed, error, MAX_BACKOFF_SECONDS)
+        metrics.assets_deleted += len(done)
+        metrics.assets_failed += len(failed)
+
+        if len(entries) < BATCH_SIZE or failed:
+            return
+
+async def sweep_comments():
+    """
+    Delete the comments of recently deleted images, one bounded batch at a time,
+    and every ORPHAN_SCAN_INTERVAL_SECONDS scan for any other orphaned comments
+    """
+    while True:
+        images, deleted = await asyncio.to_thread(supabase_service.sweep_deleted_image_comments, DELETED_IMAGE_BATCH_SIZE)
+        metrics.comments_deleted += deleted
+        if images < DELETED_IMAGE_BATCH_SIZE:
+            break
+
+    if metrics.last_orphan_scan_at and time.time() - metrics.last_orphan_scan_at < ORPHAN_SCAN_INTERVAL_SECONDS:
+        return
+    while True:
+        deleted = await asyncio.to_thread(supabase_service.sweep_orphaned_comments, COMMENT_BATCH_SIZE)
+        metrics.comments_deleted += deleted
+        if deleted < COMMENT_BATCH_SIZE:
+            break
+    metrics.last_orphan_scan_at = time.time()
+
+async def run_once():
+    """One cleanup pass: drain the asset outbox, then sweep orphaned comments"""
+    try:
+        await drain_assets()
+        await sweep_comments()
+    except Exception as e:
+        metrics.last_error = str(e)
+        print(f"Error during cleanup: {e}")
+    metrics.backlog = await asyncio.to_thread(supabase_service.get_cleanup_backlog)
+    metrics.runs += 1
+    metrics.last_run_at = time.time()
+
+async def _run_forever():
+    while True:
+        await run_once()
+        await asyncio.sleep(INTERVAL_SECONDS)
+
+def start():
+    """Start the background worker, if enabled"""
+    global _task
+    if CLEANUP_ENABLED and _task is None:
+        _task = asyncio.create_task(_run_forever())
+
+async def stop():
+    """Cancel the background worker and wait for it to finish"""
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
+
+def stats() -> Dict[str, Any]:
+    """Worker progress and the queue depth seen at the end of the last run, for /health"""
+    return {"enabled": CLEANUP_ENABLED, **metrics.snapshot()}
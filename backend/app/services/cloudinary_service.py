@@ -1,20 +1,113 @@
 import os
-import cloudinary
-import cloudinary.uploader
-import requests
-from typing import Optional
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
-
-# Configure Cloudinary
-cloudinary.config(
-    cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
-    api_key=os.getenv("CLOUDINARY_API_KEY"),
-    api_secret=os.getenv("CLOUDINARY_API_SECRET"),
-    secure=True
-)
+import httpx
+from typing import Any, Dict, List, Optional
+from . import http_service
+from .circuit_breaker_service import get_breaker, hedged, CircuitOpenError
+
+cloudinary_breaker = get_breaker("cloudinary")
+download_breaker = get_breaker("image_download")
+
+# Start a second download if the first has not finished after this many seconds (0 disables)
+DOWNLOAD_HEDGE_DELAY = float(os.getenv("IMAGE_DOWNLOAD_HEDGE_DELAY", "0"))
+
+_cloudinary = None
+
+def get_cloudinary():
+    """
+    Get the Cloudinary SDK, importing and configuring it on first use.
+    The SDK is only used for configuration, URLs and request signing;
+    the HTTP calls go through the shared client in http_service.
+    """
+    global _cloudinary
+    if _cloudinary is None:
+        import cloudinary
+        import cloudinary.utils
+
+        cloudinary.config(
+            cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
+            api_key=os.getenv("CLOUDINARY_API_KEY"),
+            api_secret=os.getenv("CLOUDINARY_API_SECRET"),
+            secure=True
+        )
+
+        # Lets the API host be pointed at a local fake server
+        if os.getenv("CLOUDINARY_UPLOAD_PREFIX"):
+            cloudinary.config(upload_prefix=os.getenv("CLOUDINARY_UPLOAD_PREFIX"))
+
+        _cloudinary = cloudinary
+    return _cloudinary
+
+def api_base_url() -> str:
+    """Root of the Cloudinary API, used to pre-connect during warm-up"""
+    cloudinary = get_cloudinary()
+    return cloudinary.config().upload_prefix or "https://api.cloudinary.com"
+
+async def _call_api(action: str, params: Dict[str, Any], files: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Make a signed call to the Cloudinary image API
+    """
+    cloudinary = get_cloudinary()
+    signed = cloudinary.utils.sign_request({**params, "timestamp": cloudinary.utils.now()}, {})
+    url = cloudinary.utils.cloudinary_api_url(action, resource_type="image")
+    response = await http_service.get_client().post(
+        url,
+        data=signed,
+        files=files,
+        timeout=http_service.call_timeout(cloudinary_breaker.timeout)
+    )
+    # Server errors count against the breaker; client errors come back in the JSON body
+    if response.status_code >= 500:
+        response.raise_for_status()
+    return response.json()
+
+async def delete_images(public_ids: List[str]) -> Dict[str, bool]:
+    """
+    Delete up to 100 images in one Admin API call
+    Returns whether each public ID is gone (already-missing assets count as gone)
+    """
+    cloudinary = get_cloudinary()
+    config = cloudinary.config()
+    url = cloudinary.utils.base_api_url(["resources", "image", "upload"])
+
+    async def call():
+        response = await http_service.get_client().request(
+            "DELETE",
+            url,
+            params=[("public_ids[]", public_id) for public_id in public_ids],
+            auth=(config.api_key, config.api_secret),
+            timeout=http_service.call_timeout(cloudinary_breaker.timeout)
+        )
+        # Only server errors count against the breaker, so hitting the Admin API's
+        # rate limit during cleanup never blocks user uploads
+        if response.status_code >= 500:
+            response.raise_for_status()
+        return response
+
+    response = await cloudinary_breaker.call_async(call)
+    response.raise_for_status()
+    deleted = response.json().get("deleted", {})
+    return {
+        public_id: deleted.get(public_id) in ("deleted", "not_found")
+        for public_id in public_ids
+    }
+
+async def _fetch(image_url: str) -> httpx.Response:
+    response = await http_service.get_client().get(image_url, timeout=http_service.call_timeout(download_breaker.timeout))
+    # Server errors count against the breaker; client errors are the caller's problem
+    if response.status_code >= 500:
+        response.raise_for_status()
+    return response
+
+async def download_image(image_url: str) -> httpx.Response:
+    """
+    Download an image, hedging with a second request if DOWNLOAD_HEDGE_DELAY is set
+    """
+    def attempt():
+        return download_breaker.call_async(lambda: _fetch(image_url))
+
+    if DOWNLOAD_HEDGE_DELAY > 0:
+        return await hedged(attempt, DOWNLOAD_HEDGE_DELAY)
+    return await attempt()
 
 async def upload_image_from_url(image_url: str, folder: str = "ai-images") -> Optional[str]:
     """
@@ -23,19 +116,25 @@ async def upload_image_from_url(image_url: str, folder: str = "ai-images") -> Op
     """
     try:
         # Download the image from the URL
-        response = requests.get(image_url)
+        response = await download_image(image_url)
         if response.status_code != 200:
             print(f"Failed to download image from URL: {response.status_code}")
             return None
-            
+
         # Upload to Cloudinary
-        result = cloudinary.uploader.upload(
-            response.content,
-            folder=folder,
-            resource_type="image"
-        )
-        
+        result = await cloudinary_breaker.call_async(lambda: _call_api(
+            "upload",
+            {"folder": folder},
+            files={"file": ("image", response.content)}
+        ))
+        if "error" in result:
+            print(f"Cloudinary rejected upload: {result['error']}")
+            return None
+
         return result["secure_url"]
+    except CircuitOpenError:
+        # Surfaced to the client as 503 with Retry-After
+        raise
     except Exception as e:
         print(f"Error uploading image to Cloudinary: {e}")
         return None
@@ -46,8 +145,11 @@ async def delete_image(public_id: str) -> bool:
     Returns True if successful, False otherwise
     """
     try:
-        result = cloudinary.uploader.destroy(public_id)
+        result = await cloudinary_breaker.call_async(lambda: _call_api(
+            "destroy",
+            {"public_id": public_id}
+        ))
         return result["result"] == "ok"
     except Exception as e:
         print(f"Error deleting image from Cloudinary: {e}")
-        return False 
\ No newline at end of file
+        return False
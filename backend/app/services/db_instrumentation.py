@@ -0,0 +1,165 @@
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional
+import psycopg2.extras
+
+SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "200"))
+QUERY_BUDGET = int(os.getenv("DB_QUERY_BUDGET", "10"))
+EXPLAIN_SLOW_QUERIES = os.getenv("DB_EXPLAIN_SLOW_QUERIES", "true").lower() == "true"
+# Explain each named query at most once per this many seconds
+EXPLAIN_COOLDOWN_SECONDS = 300
+
+_TABLE = re.compile(r'\b(?:FROM|INTO|UPDATE)\s+"?(\w+)"?', re.IGNORECASE)
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+
+class QueryRecord:
+    def __init__(self, name: str, sql: str, duration_ms: float):
+        self.name = name
+        self.sql = sql
+        self.duration_ms = duration_ms
+
+class RequestQueries:
+    """Queries issued while handling one request"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+
+class QueryStats:
+    """Running totals for one named query"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.slow = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total_ms / self.count, 2) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 2),
+            "slow": self.slow,
+        }
+
+stats: Dict[str, QueryStats] = {}
+current_request: ContextVar[Optional[RequestQueries]] = ContextVar("current_request", default=None)
+_recorders: List[List[QueryRecord]] = []
+_last_explained: Dict[str, float] = {}
+_explainer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="explain")
+
+# Set by supabase_service so EXPLAIN can borrow a pooled connection
+connection_provider: Optional[Callable[[], Any]] = None
+
+@lru_cache(maxsize=1024)
+def query_name(sql: str, caller: str) -> str:
+    """
+    Name a query after the function that ran it plus its verb and main table,
+    e.g. like_image:INSERT Like. Tables inside subqueries don't count: the main
+    table is a write's target, or the last top-level FROM of a read.
+    """
+    words = sql.split(None, 1)
+    verb = words[0].upper() if words else "QUERY"
+    masked = _STRING_LITERAL.sub(lambda literal: " " * len(literal.group()), sql)
+    tables = [
+        match.group(1) for match in _TABLE.finditer(masked)
+        if masked.count("(", 0, match.start()) == masked.count(")", 0, match.start())
+    ]
+    if not tables:
+        return f"{caller}:{verb}"
+    table = tables[-1] if verb in ("SELECT", "WITH") else tables[0]
+    return f"{caller}:{verb} {table}"
+
+def _explain(name: str, sql: str):
+    try:
+        with connection_provider() as conn:
+            # A plain cursor, so the EXPLAIN itself isn't recorded
+            with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+                # Plain EXPLAIN only plans the statement; it never executes it
+                cur.execute("EXPLAIN " + sql)
+                # Plans echo bound values (emails, comment text) in their conditions
+                plan = "\n".join(_STRING_LITERAL.sub("'?'", row["QUERY PLAN"]) for row in cur.fetchall())
+        print(f"Plan for slow query {name}:\n{plan}")
+    except Exception as e:
+        print(f"Could not explain slow query {name}: {e}")
+
+def record(name: str, sql: str, duration_ms: float, bound_sql: Optional[str] = None):
+    """
+    Account for one executed query. sql is the parameterized template, which is
+    what gets logged; bound_sql, with values filled in, is only used for EXPLAIN.
+    """
+    query_stats = stats.get(name)
+    if query_stats is None:
+        query_stats = stats[name] = QueryStats()
+    query_stats.count += 1
+    query_stats.total_ms += duration_ms
+    query_stats.max_ms = max(query_stats.max_ms, duration_ms)
+
+    request = current_request.get()
+    if request is not None:
+        request.count += 1
+        request.total_ms += duration_ms
+
+    for recorder in _recorders:
+        recorder.append(QueryRecord(name, sql, duration_ms))
+
+    if duration_ms >= SLOW_QUERY_MS:
+        query_stats.slow += 1
+        print(f"Slow query {name} took {duration_ms:.1f} ms: {' '.join(sql.split())[:500]}")
+        now = time.monotonic()
+        if (
+            EXPLAIN_SLOW_QUERIES
+            and connection_provider is not None
+            and now - _last_explained.get(name, -EXPLAIN_COOLDOWN_SECONDS) >= EXPLAIN_COOLDOWN_SECONDS
+        ):
+            _last_explained[name] = now
+            _explainer.submit(_explain, name, bound_sql or sql)
+
+class InstrumentedCursor(psycopg2.extras.RealDictCursor):
+    """RealDictCursor that times every statement and names it after its caller"""
+
+    def execute(self, query, vars=None):
+        name = query_name(query, sys._getframe(1).f_code.co_name)
+        started = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000
+            record(name, query, duration_ms, self.query.decode() if self.query else None)
+
+def top_queries(limit: int = 10) -> Dict[str, Dict[str, Any]]:
+    """The named queries with the most total time, for /health"""
+    ranked = sorted(stats.items(), key=lambda item: item[1].total_ms, reverse=True)
+    return {name: query_stats.snapshot() for name, query_stats in ranked[:limit]}
+
+@contextmanager
+def capture_queries():
+    """
+    Collect every query executed inside the block, from any thread.
+    Intended for tests, e.g.:
+
+        with capture_queries() as queries:
+            client.get("/images/explore")
+        assert len(queries) == 1
+    """
+    queries: List[QueryRecord] = []
+    _recorders.append(queries)
+    try:
+        yield queries
+    finally:
+        _recorders.remove(queries)
+
+@contextmanager
+def assert_max_queries(expected: int):
+    """Fail if the block executes more than expected queries, listing them"""
+    with capture_queries() as queries:
+        yield queries
+    if len(queries) > expected:
+        names = "\n".join(f"  {query.name}" for query in queries)
+        raise AssertionError(f"Expected at most {expected} queries, got {len(queries)}:\n{names}")
@@ -0,0 +1,176 @@
+import os
+import time
+import asyncio
+from typing import Any, Dict, List, Optional
+import httpx
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Pool configuration
+MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+MAX_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", "20"))
+KEEPALIVE_SECONDS = float(os.getenv("HTTP_KEEPALIVE_SECONDS", "60"))
+CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "60"))
+
+def call_timeout(seconds: float) -> httpx.Timeout:
+    """
+    Timeout for a call allowed up to seconds per phase, keeping the pool's
+    connect timeout so an unreachable host fails fast
+    """
+    return httpx.Timeout(seconds, connect=min(CONNECT_TIMEOUT, seconds))
+
+class PoolMetrics:
+    """Counters for connection reuse and time spent waiting for a per-host slot"""
+
+    def __init__(self):
+        self.requests = 0
+        self.new_connections = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        reused = max(self.requests - self.new_connections, 0)
+        return {
+            "requests": self.requests,
+            "new_connections": self.new_connections,
+            "reuse_ratio": round(reused / self.requests, 3) if self.requests else 0.0,
+            "avg_wait_ms": round(self.total_wait / self.requests * 1000, 2) if self.requests else 0.0,
+            "max_wait_ms": round(self.max_wait * 1000, 2),
+        }
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """Response body that gives back its per-host slot once closed"""
+
+    def __init__(self, stream: httpx.AsyncByteStream, slot: asyncio.Semaphore):
+        self._stream = stream
+        self._slot: Optional[asyncio.Semaphore] = slot
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            if self._slot is not None:
+                self._slot.release()
+                self._slot = None
+
+class LimitedTransport(httpx.AsyncBaseTransport):
+    """
+    Wraps the pooled transport to cap concurrent requests per host and record
+    pool metrics. Applies to every client built on it, including the OpenAI SDK.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, per_host: int, metrics: PoolMetrics):
+        self._transport = transport
+        self._per_host = per_host
+        self._slots: Dict[str, asyncio.Semaphore] = {}
+        self.metrics = metrics
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        slot = self._slots.get(host)
+        if slot is None:
+            slot = self._slots[host] = asyncio.Semaphore(self._per_host)
+
+        started = time.perf_counter()
+        await slot.acquire()
+        waited = time.perf_counter() - started
+        self.metrics.requests += 1
+        self.metrics.total_wait += waited
+        self.metrics.max_wait = max(self.metrics.max_wait, waited)
+
+        outer_trace = request.extensions.get("trace")
+
+        async def trace(event_name: str, info: Dict[str, Any]):
+            if event_name == "connection.connect_tcp.started":
+                self.metrics.new_connections += 1
+            if outer_trace is not None:
+                await outer_trace(event_name, info)
+
+        request.extensions["trace"] = trace
+
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException:
+            slot.release()
+            raise
+        response.stream = _ReleasingStream(response.stream, slot)
+        return response
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+    def in_flight(self) -> Dict[str, int]:
+        return {
+            host: self._per_host - slot._value
+            for host, slot in self._slots.items()
+            if slot._value < self._per_host
+        }
+
+metrics = PoolMetrics()
+_transport: Optional[LimitedTransport] = None
+_client: Optional[httpx.AsyncClient] = None
+
+def get_client() -> httpx.AsyncClient:
+    """
+    Get the shared HTTP client, creating it on first use.
+    Normally created and closed by the app's lifespan handler.
+    """
+    global _client, _transport
+    if _client is None:
+        _transport = LimitedTransport(
+            httpx.AsyncHTTPTransport(
+                http2=HTTP2_AVAILABLE,
+                limits=httpx.Limits(
+                    max_connections=MAX_CONNECTIONS,
+                    max_keepalive_connections=MAX_CONNECTIONS,
+                    keepalive_expiry=KEEPALIVE_SECONDS
+                )
+            ),
+            MAX_CONNECTIONS_PER_HOST,
+            metrics
+        )
+        _client = httpx.AsyncClient(
+            transport=_transport,
+            timeout=call_timeout(READ_TIMEOUT),
+            follow_redirects=True
+        )
+    return _client
+
+async def close():
+    """Close the shared client and every pooled connection"""
+    global _client, _transport
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+        _transport = None
+
+async def warm_up(urls: List[str]):
+    """
+    Open a keep-alive connection to each URL's host; the responses themselves are ignored
+    """
+    client = get_client()
+
+    async def touch(url: str):
+        try:
+            await client.head(url)
+        except httpx.HTTPError as e:
+            print(f"Could not pre-connect to {url}: {e}")
+
+    await asyncio.gather(*(touch(url) for url in urls))
+
+def stats() -> Dict[str, Any]:
+    """Pool metrics, for /health"""
+    return {
+        **metrics.snapshot(),
+        "http2": HTTP2_AVAILABLE,
+        "in_flight": _transport.in_flight() if _transport else {},
+    }
@@ -1,27 +1,63 @@
 import os
-import openai
 from typing import Optional, Dict, Any
-from dotenv import load_dotenv
+from . import http_service
+from .circuit_breaker_service import get_breaker, CircuitOpenError
 
-# Load environment variables
-load_dotenv()
+breaker = get_breaker("openai")
 
-# Initialize OpenAI client
-client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+_client = None
+
+def get_client():
+    """
+    Get the OpenAI client, importing the SDK and building the client on first use.
+    The client sends its requests through the shared pool in http_service.
+    """
+    global _client
+    if _client is None:
+        import openai
+
+        # The breaker handles fail-fast, so no SDK-level retries
+        _client = openai.AsyncOpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            timeout=http_service.call_timeout(breaker.timeout),
+            max_retries=0,
+            http_client=http_service.get_client()
+        )
+    return _client
+
+def _is_failure(error: Exception) -> bool:
+    """
+    Whether an error means OpenAI is unhealthy. Rejected requests (4xx, such as
+    content-policy refusals) are the caller's problem; 429 and 5xx are not.
+    """
+    import openai
+
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code >= 500 or error.status_code == 429
+    return True
+
+def api_base_url() -> str:
+    """Root of the OpenAI API, used to pre-connect during warm-up"""
+    return str(get_client().base_url)
+
+def close():
+    """Drop the client; the shared HTTP pool it uses is closed by http_service"""
+    global _client
+    _client = None
 
 async def refine_prompt(prompt: str) -> str:
     """
     Use GPT-4 to refine the user's prompt for better image generation
     """
     try:
-        response = client.chat.completions.create(
+        response = await breaker.call_async(lambda: get_client().chat.completions.create(
             model="gpt-4",
             messages=[
                 {"role": "system", "content": "You are an expert at creating detailed, descriptive prompts for DALL-E image generation. Your task is to enhance the user's prompt to create a more vivid, detailed image. Keep the core idea but add details about style, lighting, composition, and mood. Don't make it too long - aim for 2-3 sentences maximum."},
                 {"role": "user", "content": f"Please enhance this image prompt: {prompt}"}
             ],
             max_tokens=150
-        )
+        ), is_failure=_is_failure)
         return response.choices[0].message.content.strip()
     except Exception as e:
         print(f"Error refining prompt: {e}")
@@ -33,14 +69,17 @@ async def generate_image(prompt: str) -> Optional[str]:
     Returns the URL of the generated image
     """
     try:
-        response = client.images.generate(
+        response = await breaker.call_async(lambda: get_client().images.generate(
             model="dall-e-3",
             prompt=prompt,
             size="1024x1024",
             quality="standard",
             n=1
-        )
+        ), is_failure=_is_failure)
         return response.data[0].url
+    except CircuitOpenError:
+        # Surfaced to the client as 503 with Retry-After
+        raise
     except Exception as e:
         print(f"Error generating image: {e}")
         return None 
\ No newline at end of file
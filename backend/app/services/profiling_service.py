@@ -0,0 +1,155 @@
+import os
+import re
+import hmac
+import time
+import uuid
+import random
+import pstats
+import cProfile
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+from .rate_limit_service import TokenBucket
+
+try:
+    from pyinstrument import Profiler
+    from pyinstrument.renderers import SpeedscopeRenderer
+    SAMPLING_AVAILABLE = True
+except ImportError:
+    SAMPLING_AVAILABLE = False
+
+SAMPLE = "sample"
+DETERMINISTIC = "deterministic"
+
+# Profiling is off unless an admin token or a sampling rate is configured
+ADMIN_TOKEN = os.getenv("PROFILE_ADMIN_TOKEN")
+SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+# Overhead budget: profiled requests per minute, and the sampling interval
+MAX_PER_MINUTE = float(os.getenv("PROFILE_MAX_PER_MINUTE", "6"))
+SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.005"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "/tmp/visionary-profiles")
+KEEP_PROFILES = int(os.getenv("PROFILE_KEEP", "50"))
+
+_budget = TokenBucket(MAX_PER_MINUTE, MAX_PER_MINUTE)
+# Only one profile at a time: cProfile can't nest, and it keeps overhead bounded
+_active = False
+# Requests this worker is handling, so deterministic profiles only run when it is otherwise idle
+_in_flight = 0
+
+def is_admin(token: Optional[str]) -> bool:
+    return bool(ADMIN_TOKEN) and token is not None and hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode())
+
+@contextmanager
+def tracking_request():
+    """Count a request as in flight for the duration of the block"""
+    global _in_flight
+    _in_flight += 1
+    try:
+        yield
+    finally:
+        _in_flight -= 1
+
+def choose_mode(requested: Optional[str], token: Optional[str]) -> Optional[str]:
+    """
+    Decide whether to profile a request and how.
+    Admins pick the mode with the X-Profile header; otherwise a SAMPLE_RATE
+    fraction of requests get a sampling profile. Deterministic profiles only
+    run while no other request is in flight. Returns None to skip.
+    """
+    if _active:
+        return None
+    admin = bool(requested) and is_admin(token)
+    if admin:
+        mode = DETERMINISTIC if requested == DETERMINISTIC else SAMPLE
+    elif SAMPLE_RATE > 0 and random.random() < SAMPLE_RATE:
+        mode = SAMPLE
+    else:
+        return None
+    if mode == SAMPLE and not SAMPLING_AVAILABLE:
+        # Live traffic is only ever sampled; admins can still get a deterministic profile
+        if not admin:
+            return None
+        mode = DETERMINISTIC
+    if mode == DETERMINISTIC and _in_flight > 0:
+        # cProfile traces the whole event-loop thread, so concurrent requests would be
+        # mixed into the profile and slowed down; only run it on an otherwise idle worker
+        if not SAMPLING_AVAILABLE:
+            return None
+        mode = SAMPLE
+    if _budget.try_acquire() != 0:
+        return None
+    return mode
+
+class RequestProfile:
+    """A profile of one request, saved to PROFILE_DIR when stopped"""
+
+    def __init__(self, mode: str, method: str, path: str):
+        self.mode = mode
+        self.name = "{}-{}-{}-{}".format(
+            time.strftime("%Y%m%dT%H%M%S"),
+            method.lower(),
+            re.sub(r"[^A-Za-z0-9]+", "_", path).strip("_") or "root",
+            uuid.uuid4().hex[:6]
+        )
+        if mode == SAMPLE:
+            self._profiler = Profiler(interval=SAMPLE_INTERVAL, async_mode="enabled")
+        else:
+            self._profiler = cProfile.Profile()
+
+    def start(self):
+        global _active
+        if self.mode == SAMPLE:
+            self._profiler.start()
+        else:
+            self._profiler.enable()
+        _active = True
+
+    def stop(self) -> str:
+        """
+        Stop profiling and write the profile; returns its file name.
+        Sampling profiles are speedscope JSON (open in speedscope.app as a flamegraph);
+        deterministic ones are pstats files for snakeviz, flameprof or gprof2dot.
+        """
+        global _active
+        try:
+            if self.mode == SAMPLE:
+                self._profiler.stop()
+                file_name = f"{self.name}.speedscope.json"
+                content = self._profiler.output(SpeedscopeRenderer())
+                os.makedirs(PROFILE_DIR, exist_ok=True)
+                with open(os.path.join(PROFILE_DIR, file_name), "w") as f:
+                    f.write(content)
+            else:
+                self._profiler.disable()
+                file_name = f"{self.name}.prof"
+                os.makedirs(PROFILE_DIR, exist_ok=True)
+                pstats.Stats(self._profiler).dump_stats(os.path.join(PROFILE_DIR, file_name))
+        finally:
+            _active = False
+        _prune()
+        return file_name
+
+def _prune():
+    """Keep only the newest KEEP_PROFILES files"""
+    for profile in list_profiles()[KEEP_PROFILES:]:
+        try:
+            os.remove(os.path.join(PROFILE_DIR, profile["name"]))
+        except OSError:
+            pass
+
+def list_profiles() -> List[Dict[str, Any]]:
+    """Stored profiles, newest first"""
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    profiles = []
+    for entry in os.scandir(PROFILE_DIR):
+        if entry.is_file():
+            stat = entry.stat()
+            profiles.append({"name": entry.name, "size": stat.st_size, "created_at": stat.st_mtime})
+    return sorted(profiles, key=lambda profile: profile["created_at"], reverse=True)
+
+def get_profile_path(name: str) -> Optional[str]:
+    """Path of a stored profile, or None if it doesn't exist"""
+    if os.path.basename(name) != name:
+        return None
+    path = os.path.join(PROFILE_DIR, name)
+    return path if os.path.isfile(path) else None
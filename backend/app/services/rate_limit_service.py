@@ -0,0 +1,172 @@
+import os
+import math
+import time
+import asyncio
+from typing import Dict, Tuple
+from fastapi import Header, HTTPException, status
+
+# Per-user token bucket budgets for each endpoint cost class: (burst capacity, tokens per minute)
+COST_CLASSES: Dict[str, Tuple[float, float]] = {
+    "generate": (
+        float(os.getenv("RATE_LIMIT_GENERATE_BURST", "5")),
+        float(os.getenv("RATE_LIMIT_GENERATE_PER_MINUTE", "5")),
+    ),
+    "upload": (
+        float(os.getenv("RATE_LIMIT_UPLOAD_BURST", "10")),
+        float(os.getenv("RATE_LIMIT_UPLOAD_PER_MINUTE", "20")),
+    ),
+}
+
+# Global gate shared by all expensive endpoints
+MAX_CONCURRENT = int(os.getenv("EXPENSIVE_MAX_CONCURRENT", "8"))
+MAX_QUEUED = int(os.getenv("EXPENSIVE_MAX_QUEUED", "16"))
+
+# Idle buckets are dropped once this many are tracked
+MAX_TRACKED_BUCKETS = 10000
+
+class TokenBucket:
+    """A token bucket refilled continuously at a fixed rate"""
+
+    def __init__(self, capacity: float, per_minute: float):
+        self.capacity = capacity
+        self.rate = per_minute / 60.0
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self, cost: float = 1.0) -> float:
+        """
+        Take cost tokens if available
+        Returns 0 on success, otherwise the seconds until enough tokens accrue
+        """
+        now = time.monotonic()
+        self._refill(now)
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        if self.rate <= 0:
+            return 60.0
+        return (cost - self.tokens) / self.rate
+
+    def refund(self, cost: float = 1.0):
+        """Give back tokens taken for a request that was never served"""
+        self.tokens = min(self.capacity, self.tokens + cost)
+
+    def is_full(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+class RateLimiter:
+    """Token buckets keyed by (cost class, user ID)"""
+
+    def __init__(self, cost_classes: Dict[str, Tuple[float, float]]):
+        self.cost_classes = cost_classes
+        self.buckets: Dict[Tuple[str, str], TokenBucket] = {}
+
+    def check(self, cost_class: str, user_id: str) -> float:
+        """
+        Charge one request to the user's budget for cost_class
+        Returns 0 if allowed, otherwise the Retry-After delay in seconds
+        """
+        key = (cost_class, user_id)
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            if len(self.buckets) >= MAX_TRACKED_BUCKETS:
+                self._prune()
+            capacity, per_minute = self.cost_classes[cost_class]
+            bucket = self.buckets[key] = TokenBucket(capacity, per_minute)
+        return bucket.try_acquire()
+
+    def refund(self, cost_class: str, user_id: str):
+        """Undo a successful check(), e.g. when the request is shed afterwards"""
+        bucket = self.buckets.get((cost_class, user_id))
+        if bucket is not None:
+            bucket.refund()
+
+    def _prune(self):
+        """Forget buckets that have refilled completely, they hold no state"""
+        now = time.monotonic()
+        for key in [key for key, bucket in self.buckets.items() if bucket.is_full(now)]:
+            del self.buckets[key]
+
+class ConcurrencyGate:
+    """
+    Bounds in-flight expensive requests and sheds load once the wait queue is full,
+    so a generation spike cannot tie up every worker serving cheap reads
+    """
+
+    def __init__(self, max_concurrent: int, max_queued: int):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.in_flight = 0
+        self.waiting = 0
+        self.avg_hold = 10.0  # Seconds, smoothed over completed requests
+        self._slots = asyncio.Semaphore(max_concurrent)
+
+    def retry_after(self) -> float:
+        """Rough time until a queued request would get a slot"""
+        return self.avg_hold * (self.waiting + 1) / max(self.max_concurrent, 1)
+
+    async def acquire(self) -> bool:
+        """Wait for a slot, or return False immediately if the queue is full"""
+        if self.in_flight >= self.max_concurrent and self.waiting >= self.max_queued:
+            return False
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+        return True
+
+    def release(self, held_for: float):
+        self.in_flight -= 1
+        self.avg_hold = 0.8 * self.avg_hold + 0.2 * held_for
+        self._slots.release()
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "max_concurrent": self.max_concurrent,
+            "max_queued": self.max_queued,
+        }
+
+limiter = RateLimiter(COST_CLASSES)
+gate = ConcurrencyGate(MAX_CONCURRENT, MAX_QUEUED)
+
+def _too_many_requests(detail: str, retry_after: float) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=detail,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+    )
+
+def admit(cost_class: str):
+    """
+    Build a dependency that applies the per-user budget for cost_class
+    and then holds a slot in the global gate for the rest of the request
+    """
+    if cost_class not in COST_CLASSES:
+        raise ValueError(f"Unknown cost class: {cost_class}")
+
+    async def dependency(user_id: str = Header(..., description="User ID from authentication")):
+        retry_after = limiter.check(cost_class, user_id)
+        if retry_after:
+            raise _too_many_requests(f"Rate limit exceeded for {cost_class} requests", retry_after)
+
+        if not await gate.acquire():
+            # The request was shed, not served, so it shouldn't count against the user
+            limiter.refund(cost_class, user_id)
+            raise _too_many_requests("Server is busy, please retry later", gate.retry_after())
+
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            gate.release(time.monotonic() - started)
+
+    return dependency
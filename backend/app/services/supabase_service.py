@@ -1,39 +1,440 @@
 import os
 import json
+import time
+import asyncio
+import base64
 import psycopg2
 import psycopg2.extras
+import psycopg2.pool
 import uuid
-from typing import List, Optional, Dict, Any
-from dotenv import load_dotenv
-from ..models.image import ImageMetadata, Comment, CommentResponse
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import List, Optional, Dict, Any, Tuple, Deque, Callable
+from . import db_instrumentation
+from ..utils.cloudinary_urls import public_id_from_url
+from ..models.image import ImageMetadata, Comment, CommentResponse, UserImageStats, ImageDetailResponse
 from ..models.user import User
 
-# Load environment variables
-load_dotenv()
+REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+# Reads go back to the primary while the replica is further behind than this
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("DB_REPLICA_MAX_LAG_SECONDS", "5"))
+REPLICA_LAG_CHECK_SECONDS = float(os.getenv("DB_REPLICA_LAG_CHECK_SECONDS", "2"))
+# Bounds how long the background lag check waits on an unreachable replica
+REPLICA_CONNECT_TIMEOUT = int(os.getenv("DB_REPLICA_CONNECT_TIMEOUT", "3"))
+# After a user writes, their own reads stay on the primary for this long
+READ_YOUR_WRITES_SECONDS = float(os.getenv("DB_READ_YOUR_WRITES_SECONDS", "10"))
 
-# Database connection parameters
-db_url = os.getenv("DATABASE_URL")
+# Pooled connections idle longer than this are checked with a round trip before use
+VALIDATE_IDLE_SECONDS = float(os.getenv("DB_VALIDATE_IDLE_SECONDS", "30"))
 
+_pool: Optional[psycopg2.pool.ThreadedConnectionPool] = None
+# id(connection) -> monotonic time it was last returned to its pool
+_last_used: Dict[int, float] = {}
+_replica_pool: Optional[psycopg2.pool.ThreadedConnectionPool] = None
+
+class ReplicaState:
+    """Health of the read replica as of the last lag check"""
+
+    def __init__(self):
+        self.healthy = False
+        self.lag_seconds: Optional[float] = None
+        # Monotonic time of the newest primary WAL position the replica has replayed
+        self.caught_up_at: Optional[float] = None
+        # (monotonic time, primary WAL position) recorded by recent checks
+        self.positions: Deque[Tuple[float, int]] = deque(maxlen=64)
+        self.last_error: Optional[str] = None
+        self.reads = 0
+        self.primary_reads = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "configured": bool(REPLICA_URL),
+            "healthy": self.healthy,
+            "lag_seconds": self.lag_seconds,
+            "last_error": self.last_error,
+            "replica_reads": self.reads,
+            "primary_reads": self.primary_reads,
+        }
+
+_replica = ReplicaState()
+_monitor_task: Optional[asyncio.Task] = None
+# User ID -> monotonic time until which their reads stay on the primary
+_pinned_to_primary: Dict[str, float] = {}
+
+# A user's ID never changes, so email lookups are cached briefly
+USER_ID_CACHE_SECONDS = float(os.getenv("USER_ID_CACHE_SECONDS", "300"))
+USER_ID_CACHE_SIZE = 10000
+# Email -> (user ID, monotonic expiry)
+_user_ids: Dict[str, Tuple[str, float]] = {}
+
+def get_pool() -> psycopg2.pool.ThreadedConnectionPool:
+    """
+    Get the connection pool, creating it on first use
+    """
+    global _pool
+    if _pool is None:
+        _pool = psycopg2.pool.ThreadedConnectionPool(
+            int(os.getenv("DB_POOL_MIN", "1")),
+            int(os.getenv("DB_POOL_MAX", "10")),
+            os.getenv("DATABASE_URL"),
+            cursor_factory=db_instrumentation.InstrumentedCursor
+        )
+    return _pool
+
+def get_replica_pool() -> Optional[psycopg2.pool.ThreadedConnectionPool]:
+    """
+    Get the read replica's connection pool, or None if no replica is configured
+    """
+    global _replica_pool
+    if _replica_pool is None and REPLICA_URL:
+        _replica_pool = psycopg2.pool.ThreadedConnectionPool(
+            int(os.getenv("DB_REPLICA_POOL_MIN", os.getenv("DB_POOL_MIN", "1"))),
+            int(os.getenv("DB_REPLICA_POOL_MAX", os.getenv("DB_POOL_MAX", "10"))),
+            REPLICA_URL,
+            connect_timeout=REPLICA_CONNECT_TIMEOUT,
+            cursor_factory=db_instrumentation.InstrumentedCursor
+        )
+    return _replica_pool
+
+def _borrow(pool: psycopg2.pool.ThreadedConnectionPool):
+    """
+    Take a connection from the pool, checking it first if it has sat idle.
+    The server or Supabase's pooler may have dropped idle connections, so any
+    that fail the check are discarded in favour of the next one or a new one.
+    """
+    for _ in range(pool.maxconn):
+        conn = pool.getconn()
+        last_used = _last_used.get(id(conn))
+        # Connections that were just opened, or returned recently, are used as is
+        if not conn.closed and (last_used is None or time.monotonic() - last_used < VALIDATE_IDLE_SECONDS):
+            return conn
+        try:
+            if conn.closed:
+                raise psycopg2.InterfaceError("connection already closed")
+            # A plain cursor, so the check isn't counted against the request
+            with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+            print(f"Discarding dropped database connection: {e}")
+            _give_back(pool, conn, close=True)
+    return pool.getconn()
+
+def _give_back(pool: psycopg2.pool.ThreadedConnectionPool, conn, close: bool = False):
+    """Return a connection to the pool, discarding it if it is closed"""
+    close = close or bool(conn.closed)
+    if close:
+        _last_used.pop(id(conn), None)
+    else:
+        _last_used[id(conn)] = time.monotonic()
+    pool.putconn(conn, close=close)
+
+def _warm_up_pool(pool: psycopg2.pool.ThreadedConnectionPool):
+    connections = [_borrow(pool) for _ in range(pool.minconn)]
+    try:
+        for conn in connections:
+            with conn:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT 1")
+    finally:
+        for conn in connections:
+            _give_back(pool, conn)
+
+def warm_up():
+    """
+    Open the minimum connections of each pool and check each one with a round trip
+    """
+    _warm_up_pool(get_pool())
+    if REPLICA_URL:
+        try:
+            _warm_up_pool(get_replica_pool())
+        except Exception as e:
+            # Reads fall back to the primary until the replica answers
+            print(f"Could not warm up the read replica: {e}")
+        _check_replica_lag()
+
+def close_pool():
+    """Close every pooled connection"""
+    global _pool, _replica_pool
+    if _pool is not None:
+        _pool.closeall()
+        _pool = None
+    if _replica_pool is not None:
+        _replica_pool.closeall()
+        _replica_pool = None
+    _last_used.clear()
+
+@contextmanager
 def get_connection():
-    """Get a PostgreSQL database connection"""
-    return psycopg2.connect(db_url, cursor_factory=psycopg2.extras.RealDictCursor)
+    """
+    Borrow a PostgreSQL connection from the pool.
+    The transaction is committed on success and rolled back on error.
+    """
+    pool = get_pool()
+    conn = _borrow(pool)
+    try:
+        with conn:
+            yield conn
+    finally:
+        _give_back(pool, conn)
+
+def _lsn(position: str) -> int:
+    """Convert a WAL position like '16/B374D848' to a byte offset"""
+    high, low = position.split("/")
+    return (int(high, 16) << 32) + int(low, 16)
+
+def _check_replica_lag():
+    """
+    Measure how far the replica is behind the primary.
+    Each check records the primary's current WAL position; the replica is caught up
+    to the newest recorded position it has replayed. That way an idle primary
+    doesn't make a stalled replica look current, and a WAL receiver that isn't
+    streaming marks the replica unhealthy right away.
+    Runs in a worker thread; requests only read the result.
+    """
+    try:
+        sampled_at = time.monotonic()
+        # Plain cursors, so the checks aren't counted against a request
+        with get_connection() as conn:
+            with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+                cur.execute("SELECT pg_current_wal_lsn()::text AS position")
+                primary_position = _lsn(cur.fetchone()["position"])
+
+        pool = get_replica_pool()
+        conn = _borrow(pool)
+        try:
+            with conn:
+                with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+                    # Without pg_read_all_stats only the receiver's pid is visible
+                    cur.execute("""
+                    SELECT pg_is_in_recovery() AS in_recovery,
+                        pg_last_wal_replay_lsn()::text AS replayed,
+                        r.pid AS receiver_pid,
+                        r.status AS receiver_status
+                    FROM (SELECT 1) AS one
+                    LEFT JOIN pg_stat_wal_receiver r ON true
+                    """)
+                    row = cur.fetchone()
+        finally:
+            _give_back(pool, conn)
+
+        _replica.positions.append((sampled_at, primary_position))
+        now = time.monotonic()
+        if not row["in_recovery"]:
+            # Not a streaming standby, so there is no replay to wait for
+            _replica.caught_up_at = now
+            _replica.last_error = None
+        elif row["receiver_pid"] is None or row["receiver_status"] not in (None, "streaming"):
+            _replica.caught_up_at = None
+            _replica.last_error = f"WAL receiver is {row['receiver_status'] or 'not running'}"
+        else:
+            replayed = _lsn(row["replayed"]) if row["replayed"] else 0
+            caught_up = [at for at, position in _replica.positions if position <= replayed]
+            _replica.caught_up_at = max(caught_up) if caught_up else None
+            _replica.last_error = None
+        _replica.lag_seconds = now - _replica.caught_up_at if _replica.caught_up_at is not None else None
+        _replica.healthy = _replica.lag_seconds is not None and _replica.lag_seconds <= REPLICA_MAX_LAG_SECONDS
+        if _replica.last_error:
+            print(f"Read replica unhealthy, reading from the primary: {_replica.last_error}")
+    except Exception as e:
+        _replica.healthy = False
+        _replica.lag_seconds = None
+        _replica.caught_up_at = None
+        _replica.last_error = str(e)
+        print(f"Read replica unavailable, reading from the primary: {e}")
+
+async def _monitor_replica():
+    while True:
+        await asyncio.to_thread(_check_replica_lag)
+        await asyncio.sleep(REPLICA_LAG_CHECK_SECONDS)
+
+def start_replica_monitor():
+    """Start checking the replica's lag in the background, if a replica is configured"""
+    global _monitor_task
+    if REPLICA_URL and _monitor_task is None:
+        _monitor_task = asyncio.create_task(_monitor_replica())
+
+async def stop_replica_monitor():
+    """Cancel the replica lag checks and wait for them to finish"""
+    global _monitor_task
+    if _monitor_task is not None:
+        _monitor_task.cancel()
+        try:
+            await _monitor_task
+        except asyncio.CancelledError:
+            pass
+        _monitor_task = None
+
+def _use_replica(user_id: Optional[str]) -> bool:
+    if not REPLICA_URL or not _replica.healthy or _replica.caught_up_at is None:
+        return False
+    if user_id and _pinned_to_primary.get(user_id, 0) > time.monotonic():
+        return False
+    # The replica may have fallen further behind since the last check, and if the
+    # checks stall this sends reads back to the primary
+    return time.monotonic() - _replica.caught_up_at <= REPLICA_MAX_LAG_SECONDS
+
+def pin_to_primary(user_id: str):
+    """
+    Send this user's reads to the primary for READ_YOUR_WRITES_SECONDS,
+    so they see their own writes before the replica catches up.
+    Pass the user's ID, not their email: reads look pins up by ID.
+    Pins are per process; behind several workers the lag guard still bounds staleness.
+    """
+    if not REPLICA_URL or not user_id:
+        return
+    now = time.monotonic()
+    for key, until in list(_pinned_to_primary.items()):
+        if until <= now:
+            _pinned_to_primary.pop(key, None)
+    _pinned_to_primary[user_id] = now + READ_YOUR_WRITES_SECONDS
+
+async def _reader_id(user_id: Optional[str]) -> Optional[str]:
+    """
+    The ID that a reader's pin is kept under, for callers that may pass an email.
+    Only resolved when a replica is configured, since only then do pins matter.
+    """
+    if user_id and "@" in user_id and REPLICA_URL:
+        return await get_user_id_by_email(user_id) or user_id
+    return user_id
+
+@contextmanager
+def get_read_connection(user_id: Optional[str] = None):
+    """
+    Borrow a connection for read-only queries: from the replica when one is
+    configured and within DB_REPLICA_MAX_LAG_SECONDS, otherwise from the primary.
+    Pass the reading user's ID so reads right after their own writes use the primary.
+    """
+    pool = None
+    conn = None
+    if _use_replica(user_id):
+        pool = get_replica_pool()
+        try:
+            conn = _borrow(pool)
+        except Exception as e:
+            # The next background check decides when to try the replica again
+            _replica.healthy = False
+            _replica.last_error = str(e)
+            print(f"Could not borrow a replica connection, reading from the primary: {e}")
+
+    if conn is None:
+        if REPLICA_URL:
+            _replica.primary_reads += 1
+        with get_connection() as conn:
+            yield conn
+        return
+
+    _replica.reads += 1
+    try:
+        if not conn.readonly:
+            conn.set_session(readonly=True)
+        with conn:
+            yield conn
+    finally:
+        _give_back(pool, conn)
+
+def replica_stats() -> Dict[str, Any]:
+    """Replica health and how reads were routed, for /health"""
+    return _replica.snapshot()
+
+db_instrumentation.connection_provider = get_connection
+
+def encode_cursor(created_at: datetime, image_id: str) -> str:
+    """
+    Encode the (created_at, id) position of an image as an opaque cursor
+    """
+    raw = json.dumps([created_at.isoformat(), image_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor: str) -> Optional[Tuple[datetime, str]]:
+    """
+    Decode a cursor produced by encode_cursor
+    Returns None if the cursor is malformed
+    """
+    try:
+        created_at, image_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(created_at), image_id
+    except Exception:
+        return None
+
+def _apply_user_stats_delta(cur, user_id: str, image_delta: int = 0, likes_delta: int = 0):
+    """
+    Incrementally adjust a user's aggregate counters inside the caller's transaction
+    """
+    query = """
+    INSERT INTO "UserStats" ("userId", image_count, total_likes, updated_at)
+    VALUES (%s, GREATEST(%s, 0), GREATEST(%s, 0), NOW())
+    ON CONFLICT ("userId") DO UPDATE
+    SET image_count = GREATEST("UserStats".image_count + %s, 0),
+        total_likes = GREATEST("UserStats".total_likes + %s, 0),
+        updated_at = NOW()
+    """
+    cur.execute(query, (user_id, image_delta, likes_delta, image_delta, likes_delta))
+
+def _offer_most_liked(cur, user_id: str, image_id: str, likes: int):
+    """
+    Make image_id the user's most-liked image if it now beats the current one
+    """
+    query = """
+    UPDATE "UserStats"
+    SET most_liked_image_id = %s, most_liked_likes = %s
+    WHERE "userId" = %s
+      AND (most_liked_image_id IS NULL OR most_liked_image_id = %s OR most_liked_likes < %s)
+    """
+    cur.execute(query, (image_id, likes, user_id, image_id, likes))
+
+def _refresh_most_liked(cur, user_id: str, image_id: str):
+    """
+    Re-pick the user's most-liked image if image_id was holding that slot.
+    Uses the ("userId", likes) index, so this is a single-row lookup.
+    """
+    query = """
+    UPDATE "UserStats" s
+    SET most_liked_image_id = top.id, most_liked_likes = COALESCE(top.likes, 0)
+    FROM (SELECT %s AS "userId") u
+    LEFT JOIN LATERAL (
+        SELECT id, likes FROM "Image"
+        WHERE "userId" = u."userId"
+        ORDER BY likes DESC, created_at DESC
+        LIMIT 1
+    ) top ON TRUE
+    WHERE s."userId" = u."userId" AND s.most_liked_image_id = %s
+    """
+    cur.execute(query, (user_id, image_id))
+
+def _select_user_id(conn, email: str) -> Optional[str]:
+    with conn.cursor() as cur:
+        query = """
+        SELECT id FROM "User" 
+        WHERE email = %s
+        """
+        cur.execute(query, (email,))
+        result = cur.fetchone()
+        return result["id"] if result else None
 
 async def get_user_id_by_email(email: str) -> Optional[str]:
     """
     Get a user's ID by their email address
+    Users who just signed up may not have reached the replica yet, so a miss
+    there is retried on the primary. Only found IDs are cached.
     """
+    now = time.monotonic()
+    cached = _user_ids.get(email)
+    if cached and cached[1] > now:
+        return cached[0]
     try:
-        with get_connection() as conn:
-            with conn.cursor() as cur:
-                query = """
-                SELECT id FROM "User" 
-                WHERE email = %s
-                """
-                cur.execute(query, (email,))
-                result = cur.fetchone()
-                if result:
-                    return result["id"]
-                return None
+        with get_read_connection() as conn:
+            user_id = _select_user_id(conn, email)
+        if user_id is None and REPLICA_URL:
+            with get_connection() as conn:
+                user_id = _select_user_id(conn, email)
+        if user_id:
+            if len(_user_ids) >= USER_ID_CACHE_SIZE:
+                _user_ids.clear()
+            _user_ids[email] = (user_id, now + USER_ID_CACHE_SECONDS)
+        return user_id
     except Exception as e:
         print(f"Error getting user ID by email: {e}")
         return None
@@ -57,6 +458,7 @@ async def save_image_metadata(
                 print(f"No user found with email: {user_id}")
                 return None
             user_id = actual_user_id
+        pin_to_primary(user_id)
 
         with get_connection() as conn:
             with conn.cursor() as cur:
@@ -71,15 +473,31 @@ async def save_image_metadata(
                 cur.execute(query, (image_id, user_id, image_url, prompt, refined_prompt, 0))
                 result = cur.fetchone()
                 if result:
+                    _apply_user_stats_delta(cur, user_id, image_delta=1)
+                    _offer_most_liked(cur, user_id, image_id, 0)
                     return result["id"]
                 return None
     except Exception as e:
         print(f"Error saving image metadata: {e}")
         return None
 
-async def get_user_images(user_id: str) -> List[ImageMetadata]:
+async def get_user_images(
+    user_id: str,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    is_current: Optional[Callable[[Optional[Dict[str, Any]]], bool]] = None
+) -> Tuple[Optional[List[ImageMetadata]], Optional[str]]:
     """
-    Get all images for a specific user
+    Get images for a specific user, newest first, using keyset pagination
+    Parameters:
+    - limit: Maximum number of images to return (all images if None)
+    - cursor: Cursor returned by a previous call to continue after
+    - is_current: Called with the images' version (the "UserStats" row, None if the
+      user has no images yet), which changes on every save, delete, like and unlike.
+      If it returns True the page isn't fetched and None is returned for it.
+      The version and the page come from the same server, so a page is never
+      older than the version it is cached under.
+    Returns the page of images and the cursor for the next page (None when exhausted)
     """
     try:
         # First, check if user_id is an email and get the actual user ID if needed
@@ -88,24 +506,62 @@ async def get_user_images(user_id: str) -> List[ImageMetadata]:
             actual_user_id = await get_user_id_by_email(user_id)
             if not actual_user_id:
                 print(f"No user found with email: {user_id}")
-                return []
+                return [], None
             user_id = actual_user_id
+
+        position = decode_cursor(cursor) if cursor else None
+        if cursor and not position:
+            print(f"Ignoring malformed cursor: {cursor}")
             
-        with get_connection() as conn:
+        with get_read_connection(user_id) as conn:
             with conn.cursor() as cur:
-                query = """
+                if is_current is not None:
+                    version_query = """
+                    SELECT image_count, total_likes, updated_at
+                    FROM "UserStats"
+                    WHERE "userId" = %s
+                    """
+                    cur.execute(version_query, (user_id,))
+                    version = cur.fetchone()
+                    if is_current(dict(version) if version else None):
+                        return None, None
+
+                conditions = ['i."userId" = %s']
+                params: List[Any] = [user_id]
+                if position:
+                    conditions.append("(i.created_at, i.id) < (%s, %s)")
+                    params.extend(position)
+
+                limit_clause = ""
+                if limit is not None:
+                    # Fetch one extra row to know whether another page exists
+                    limit_clause = "LIMIT %s"
+                    params.append(limit + 1)
+
+                query = f"""
                 SELECT i.*, u.name as "userName"
                 FROM "Image" i
                 LEFT JOIN "User" u ON i."userId" = u.id
-                WHERE i."userId" = %s
-                ORDER BY i.created_at DESC
+                WHERE {" AND ".join(conditions)}
+                ORDER BY i.created_at DESC, i.id DESC
+                {limit_clause}
                 """
-                cur.execute(query, (user_id,))
+                cur.execute(query, params)
                 results = cur.fetchall()
-                return [ImageMetadata(**dict(item)) for item in results]
+
+                next_cursor = None
+                if limit is not None and len(results) > limit:
+                    results = results[:limit]
+                    last = results[-1]
+                    next_cursor = encode_cursor(last["created_at"], last["id"])
+
+                return [ImageMetadata(**dict(item)) for item in results], next_cursor
     except Exception as e:
         print(f"Error getting user images: {e}")
-        return []
+        if is_current is not None:
+            # Don't let an empty page be cached under a valid validator
+            raise
+        return [], None
 
 async def get_explore_images(limit: int = 20, offset: int = 0, sort: Optional[str] = None) -> List[ImageMetadata]:
     """
@@ -116,7 +572,7 @@ async def get_explore_images(limit: int = 20, offset: int = 0, sort: Optional[st
     - sort: Optional sorting parameter ('likes' to sort by most liked)
     """
     try:
-        with get_connection() as conn:
+        with get_read_connection() as conn:
             with conn.cursor() as cur:
                 # Define the ORDER BY clause based on sort parameter
                 order_by = "i.likes DESC, i.created_at DESC" if sort == "likes" else "i.created_at DESC"
@@ -148,6 +604,7 @@ async def like_image(image_id: str, user_id: str) -> bool:
                 print(f"No user found with email: {user_id}")
                 return False
             user_id = actual_user_id
+        pin_to_primary(user_id)
             
         with get_connection() as conn:
             with conn.cursor() as cur:
@@ -176,8 +633,13 @@ async def like_image(image_id: str, user_id: str) -> bool:
                 UPDATE "Image" 
                 SET likes = likes + 1
                 WHERE id = %s
+                RETURNING "userId", likes
                 """
                 cur.execute(update_query, (image_id,))
+                image = cur.fetchone()
+                if image:
+                    _apply_user_stats_delta(cur, image["userId"], likes_delta=1)
+                    _offer_most_liked(cur, image["userId"], image_id, image["likes"])
                 conn.commit()
                 return True
     except Exception as e:
@@ -197,6 +659,7 @@ async def unlike_image(image_id: str, user_id: str) -> bool:
                 print(f"No user found with email: {user_id}")
                 return False
             user_id = actual_user_id
+        pin_to_primary(user_id)
             
         with get_connection() as conn:
             with conn.cursor() as cur:
@@ -222,8 +685,13 @@ async def unlike_image(image_id: str, user_id: str) -> bool:
                 UPDATE "Image" 
                 SET likes = GREATEST(likes - 1, 0)
                 WHERE id = %s
+                RETURNING "userId"
                 """
                 cur.execute(update_query, (image_id,))
+                image = cur.fetchone()
+                if image:
+                    _apply_user_stats_delta(cur, image["userId"], likes_delta=-1)
+                    _refresh_most_liked(cur, image["userId"], image_id)
                 conn.commit()
                 return True
     except Exception as e:
@@ -243,6 +711,7 @@ async def delete_image(image_id: str, user_id: str) -> bool:
                 print(f"No user found with email: {user_id}")
                 return False
             user_id = actual_user_id
+        pin_to_primary(user_id)
             
         with get_connection() as conn:
             with conn.cursor() as cur:
@@ -252,7 +721,8 @@ async def delete_image(image_id: str, user_id: str) -> bool:
                 WHERE id = %s AND "userId" = %s
                 """
                 cur.execute(check_query, (image_id, user_id))
-                if not cur.fetchone():
+                image = cur.fetchone()
+                if not image:
                     # Image doesn't belong to user
                     return False
                 
@@ -269,18 +739,227 @@ async def delete_image(image_id: str, user_id: str) -> bool:
                 WHERE id = %s
                 """
                 cur.execute(delete_image_query, (image_id,))
+
+                # Queue the stored asset for the background cleanup worker, unless
+                # another image still shows it (/save accepts any URL)
+                public_id = public_id_from_url(image["image_url"])
+                if public_id:
+                    outbox_query = """
+                    INSERT INTO "CleanupOutbox" (id, public_id, image_url)
+                    SELECT %s, %s, %s
+                    WHERE NOT EXISTS (SELECT 1 FROM "Image" WHERE image_url = %s)
+                    ON CONFLICT (public_id) DO NOTHING
+                    """
+                    cur.execute(outbox_query, (str(uuid.uuid4()), public_id, image["image_url"], image["image_url"]))
+
+                # Its comments are removed by the cleanup worker, keyed off this row
+                deleted_query = """
+                INSERT INTO "DeletedImage" (image_id)
+                VALUES (%s)
+                ON CONFLICT (image_id) DO NOTHING
+                """
+                cur.execute(deleted_query, (image_id,))
+
+                _apply_user_stats_delta(cur, user_id, image_delta=-1, likes_delta=-image["likes"])
+                _refresh_most_liked(cur, user_id, image_id)
                 conn.commit()
                 return True
     except Exception as e:
         print(f"Error deleting image: {e}")
         return False
 
+async def get_user_stats(user_id: str) -> UserImageStats:
+    """
+    Get the aggregate counters for a user's images.
+    Served from "UserStats", which is maintained on save, delete, like and unlike.
+    """
+    try:
+        # First, check if user_id is an email and get the actual user ID if needed
+        if "@" in user_id:
+            # This looks like an email address, get the actual user ID
+            actual_user_id = await get_user_id_by_email(user_id)
+            if not actual_user_id:
+                print(f"No user found with email: {user_id}")
+                return UserImageStats()
+            user_id = actual_user_id
+
+        with get_read_connection(user_id) as conn:
+            with conn.cursor() as cur:
+                query = """
+                SELECT image_count, total_likes, most_liked_image_id
+                FROM "UserStats"
+                WHERE "userId" = %s
+                """
+                cur.execute(query, (user_id,))
+                stats = cur.fetchone()
+                if not stats:
+                    return UserImageStats()
+
+                most_liked_image = None
+                if stats["most_liked_image_id"]:
+                    image_query = """
+                    SELECT i.*, u.name as "userName"
+                    FROM "Image" i
+                    LEFT JOIN "User" u ON i."userId" = u.id
+                    WHERE i.id = %s
+                    """
+                    cur.execute(image_query, (stats["most_liked_image_id"],))
+                    image = cur.fetchone()
+                    if image:
+                        most_liked_image = ImageMetadata(**dict(image))
+
+                return UserImageStats(
+                    image_count=stats["image_count"],
+                    total_likes=stats["total_likes"],
+                    most_liked_image=most_liked_image
+                )
+    except Exception as e:
+        print(f"Error getting user stats: {e}")
+        return UserImageStats()
+
+def claim_cleanup_batch(batch_size: int, lease_seconds: int) -> List[Dict[str, Any]]:
+    """
+    Lease up to batch_size due outbox entries for deletion.
+    Leased entries become due again after lease_seconds if the worker never reports back,
+    and SKIP LOCKED keeps concurrent workers from claiming the same rows.
+    Entries whose URL an image has been saved with since are dropped instead.
+    """
+    try:
+        with get_connection() as conn:
+            with conn.cursor() as cur:
+                query = """
+                UPDATE "CleanupOutbox"
+                SET next_attempt_at = NOW() + make_interval(secs => %s)
+                WHERE id IN (
+                    SELECT id FROM "CleanupOutbox"
+                    WHERE next_attempt_at <= NOW()
+                    ORDER BY next_attempt_at
+                    LIMIT %s
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING id, public_id, attempts
+                """
+                cur.execute(query, (lease_seconds, batch_size))
+                entries = [dict(row) for row in cur.fetchall()]
+                if not entries:
+                    return []
+
+                in_use_query = """
+                DELETE FROM "CleanupOutbox" o
+                WHERE o.id = ANY(%s)
+                  AND EXISTS (SELECT 1 FROM "Image" i WHERE i.image_url = o.image_url)
+                RETURNING o.id
+                """
+                cur.execute(in_use_query, ([entry["id"] for entry in entries],))
+                in_use = {row["id"] for row in cur.fetchall()}
+                return [entry for entry in entries if entry["id"] not in in_use]
+    except Exception as e:
+        print(f"Error claiming cleanup batch: {e}")
+        return []
+
+def complete_cleanup_entries(entry_ids: List[str]) -> None:
+    """
+    Remove outbox entries whose assets are gone
+    """
+    if not entry_ids:
+        return
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            query = """
+            DELETE FROM "CleanupOutbox"
+            WHERE id = ANY(%s)
+            """
+            cur.execute(query, (entry_ids,))
+
+def retry_cleanup_entries(entry_ids: List[str], error: str, max_backoff_seconds: int) -> None:
+    """
+    Schedule failed outbox entries for another attempt with exponential backoff
+    """
+    if not entry_ids:
+        return
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            query = """
+            UPDATE "CleanupOutbox"
+            SET attempts = attempts + 1,
+                last_error = %s,
+                next_attempt_at = NOW() + make_interval(secs => LEAST(30 * POWER(2, attempts), %s))
+            WHERE id = ANY(%s)
+            """
+            cur.execute(query, (error[:500], max_backoff_seconds, entry_ids))
+
+def get_cleanup_backlog() -> Dict[str, int]:
+    """
+    Count outbox entries still waiting and those that have failed at least once
+    """
+    try:
+        with get_connection() as conn:
+            with conn.cursor() as cur:
+                query = """
+                SELECT COUNT(*) AS pending, COUNT(*) FILTER (WHERE attempts > 0) AS retrying
+                FROM "CleanupOutbox"
+                """
+                cur.execute(query)
+                return dict(cur.fetchone())
+    except Exception as e:
+        print(f"Error getting cleanup backlog: {e}")
+        return {}
+
+def sweep_deleted_image_comments(batch_size: int) -> Tuple[int, int]:
+    """
+    Delete the comments of up to batch_size images recorded in "DeletedImage"
+    Returns the number of images handled and of comments deleted
+    """
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            query = """
+            DELETE FROM "DeletedImage"
+            WHERE image_id IN (
+                SELECT image_id FROM "DeletedImage"
+                ORDER BY deleted_at
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING image_id
+            """
+            cur.execute(query, (batch_size,))
+            image_ids = [row["image_id"] for row in cur.fetchall()]
+            if not image_ids:
+                return 0, 0
+
+            comments_query = """
+            DELETE FROM "Comment"
+            WHERE "imageId" = ANY(%s)
+            """
+            cur.execute(comments_query, (image_ids,))
+            return len(image_ids), cur.rowcount
+
+def sweep_orphaned_comments(batch_size: int) -> int:
+    """
+    Delete up to batch_size comments whose image no longer exists.
+    This scans the whole "Comment" table, so the cleanup worker only runs it
+    occasionally to catch comments that sweep_deleted_image_comments missed.
+    Returns the number of comments deleted
+    """
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            query = """
+            DELETE FROM "Comment"
+            WHERE id IN (
+                SELECT c.id FROM "Comment" c
+                WHERE NOT EXISTS (SELECT 1 FROM "Image" i WHERE i.id = c."imageId")
+                LIMIT %s
+            )
+            """
+            cur.execute(query, (batch_size,))
+            return cur.rowcount
+
 async def get_user(user_id: str) -> Optional[User]:
     """
     Get user by ID
     """
     try:
-        with get_connection() as conn:
+        with get_read_connection(user_id) as conn:
             with conn.cursor() as cur:
                 query = """
                 SELECT * FROM "User"
@@ -309,7 +988,7 @@ async def get_user_liked_images(user_id: str) -> List[str]:
                 return []
             user_id = actual_user_id
             
-        with get_connection() as conn:
+        with get_read_connection(user_id) as conn:
             with conn.cursor() as cur:
                 query = """
                 SELECT "imageId" FROM "Like" 
@@ -322,12 +1001,13 @@ async def get_user_liked_images(user_id: str) -> List[str]:
         print(f"Error getting user liked images: {e}")
         return []
 
-async def get_image_by_id(image_id: str) -> Optional[ImageMetadata]:
+async def get_image_by_id(image_id: str, user_id: Optional[str] = None) -> Optional[ImageMetadata]:
     """
     Get image metadata by ID
+    Pass the reading user's ID or email to see their own just-written images.
     """
     try:
-        with get_connection() as conn:
+        with get_read_connection(await _reader_id(user_id)) as conn:
             with conn.cursor() as cur:
                 # Join with User table to get user name
                 query = """
@@ -345,13 +1025,33 @@ async def get_image_by_id(image_id: str) -> Optional[ImageMetadata]:
         print(f"Error getting image by ID: {e}")
         return None
 
-async def get_image_comments(image_id: str) -> List[CommentResponse]:
+async def get_image_comments(
+    image_id: str,
+    user_id: Optional[str] = None,
+    is_current: Optional[Callable[[int, Optional[datetime]], bool]] = None
+) -> Optional[List[CommentResponse]]:
     """
     Get all comments for an image from the database
+    Pass the reading user's ID or email to see their own just-posted comments.
+    is_current is called with the number of comments and the time of the latest one;
+    comments are append-only, so together these identify the list's version. If it
+    returns True the comments aren't fetched and None is returned. Both reads use
+    the same server, so the list is never older than the version it is cached under.
     """
     try:
-        with get_connection() as conn:
+        with get_read_connection(await _reader_id(user_id)) as conn:
             with conn.cursor() as cur:
+                if is_current is not None:
+                    version_query = """
+                    SELECT COUNT(*) AS count, MAX(created_at) AS latest
+                    FROM "Comment"
+                    WHERE "imageId" = %s
+                    """
+                    cur.execute(version_query, (image_id,))
+                    version = cur.fetchone()
+                    if is_current(version["count"], version["latest"]):
+                        return None
+
                 query = """
                 SELECT * FROM "Comment"
                 WHERE "imageId" = %s
@@ -374,13 +1074,63 @@ async def get_image_comments(image_id: str) -> List[CommentResponse]:
                 return comments
     except Exception as e:
         print(f"Error getting comments: {e}")
+        if is_current is not None:
+            raise
         return []
 
+async def get_image_detail(image_id: str, viewer_id: Optional[str] = None, comment_limit: int = 20) -> Optional[ImageDetailResponse]:
+    """
+    Get an image with its first page of comments, its comment count and whether
+    the viewer (a user ID or email, if signed in) liked it, in a single query
+    """
+    try:
+        with get_read_connection(await _reader_id(viewer_id)) as conn:
+            with conn.cursor() as cur:
+                query = """
+                SELECT i.*, u.name AS "userName",
+                    (SELECT COUNT(*) FROM "Comment" c WHERE c."imageId" = i.id) AS comment_count,
+                    EXISTS (
+                        SELECT 1 FROM "Like" l
+                        WHERE l."imageId" = i.id
+                        AND (l."userId" = %s OR l."userId" IN (SELECT id FROM "User" WHERE email = %s))
+                    ) AS liked,
+                    COALESCE((
+                        SELECT json_agg(c ORDER BY c.created_at ASC)
+                        FROM (
+                            SELECT * FROM "Comment"
+                            WHERE "imageId" = i.id
+                            ORDER BY created_at ASC
+                            LIMIT %s
+                        ) c
+                    ), '[]'::json) AS comments
+                FROM "Image" i
+                LEFT JOIN "User" u ON i."userId" = u.id
+                WHERE i.id = %s
+                """
+                cur.execute(query, (viewer_id, viewer_id, comment_limit, image_id))
+                result = cur.fetchone()
+                if not result:
+                    return None
+                row = dict(result)
+                comment_count = row.pop("comment_count")
+                liked = row.pop("liked")
+                comments = [CommentResponse(**comment) for comment in row.pop("comments")]
+                return ImageDetailResponse(
+                    image=ImageMetadata(**row),
+                    comments=comments,
+                    comment_count=comment_count,
+                    liked=liked
+                )
+    except Exception as e:
+        print(f"Error getting image detail: {e}")
+        return None
+
 async def create_comment(comment: Comment) -> CommentResponse:
     """
     Create a new comment in the database
     """
     try:
+        pin_to_primary(await _reader_id(comment.userId))
         with get_connection() as conn:
             with conn.cursor() as cur:
                 query = """
@@ -0,0 +1,28 @@
+import os
+import re
+from typing import Optional
+from urllib.parse import unquote, urlparse
+
+def public_id_from_url(image_url: str) -> Optional[str]:
+    """
+    Extract the public ID from a delivery URL in our own cloud, e.g.
+    https://res.cloudinary.com/<cloud>/image/upload/v1712345678/ai-images/abc.png -> ai-images/abc
+    Returns None for anything else, such as OpenAI URLs saved without upload
+    """
+    cloud_name = os.getenv("CLOUDINARY_CLOUD_NAME")
+    if not cloud_name:
+        return None
+    prefix = f"/{cloud_name}/image/upload/"
+    path = urlparse(image_url).path
+    if not path.startswith(prefix):
+        return None
+    segments = path[len(prefix):].split("/")
+    # Everything after the version segment is the public ID
+    for index, segment in enumerate(segments):
+        if re.fullmatch(r"v\d+", segment):
+            segments = segments[index + 1:]
+            break
+    if not segments or not segments[-1]:
+        return None
+    segments[-1] = os.path.splitext(segments[-1])[0]
+    return unquote("/".join(segments))
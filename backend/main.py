@@ -1,17 +1,76 @@
 import os
-from fastapi import FastAPI, Depends, HTTPException, status
+import math
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Optional
-from datetime import datetime
-import json
-import requests
 from dotenv import load_dotenv
-from app.routers import images
 
-# Load environment variables
+# Load environment variables before any service reads its configuration,
+# which is why the app imports below come after this call
 load_dotenv()
 
-app = FastAPI(title="AI Image Generator API")
+from app.routers import images, profiles  # noqa: E402
+from app.middleware.compression import CompressionMiddleware  # noqa: E402
+from app.middleware.profiling import profile_requests  # noqa: E402
+from app.middleware.db_queries import track_queries  # noqa: E402
+from app.services import rate_limit_service, circuit_breaker_service, supabase_service, openai_service, cloudinary_service, http_service, cleanup_service, db_instrumentation  # noqa: E402
+
+def load_sdks():
+    """Import and configure the OpenAI and Cloudinary SDKs"""
+    openai_service.get_client()
+    cloudinary_service.get_cloudinary()
+
+async def connect_apis():
+    """Load the SDKs, then open keep-alive connections to their API hosts"""
+    await asyncio.to_thread(load_sdks)
+    await http_service.warm_up([openai_service.api_base_url(), cloudinary_service.api_base_url()])
+
+async def warm_up():
+    """
+    Pre-open database and HTTP connections so the first request doesn't pay for them
+    """
+    results = await asyncio.gather(
+        asyncio.to_thread(supabase_service.warm_up),
+        connect_apis(),
+        return_exceptions=True
+    )
+    for result in results:
+        if isinstance(result, Exception):
+            print(f"Warm-up step failed: {result}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Uvicorn only starts accepting requests once this returns control
+    started = time.perf_counter()
+    http_service.get_client()
+    if os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true":
+        await warm_up()
+    app.state.startup = {
+        "warmup_seconds": round(time.perf_counter() - started, 3),
+    }
+    print(f"Startup complete: {app.state.startup}")
+    supabase_service.start_replica_monitor()
+    cleanup_service.start()
+    yield
+    await cleanup_service.stop()
+    await supabase_service.stop_replica_monitor()
+    openai_service.close()
+    await http_service.close()
+    supabase_service.close_pool()
+
+app = FastAPI(title="AI Image Generator API", lifespan=lifespan)
+
+@app.exception_handler(circuit_breaker_service.CircuitOpenError)
+async def circuit_open_handler(request: Request, exc: circuit_breaker_service.CircuitOpenError):
+    """A dependency is failing fast: tell the client when to retry instead of a generic 500"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": f"The {exc.name} service is temporarily unavailable, please retry later"},
+        headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))}
+    )
 
 # Configure CORS
 frontend_url = os.getenv("FRONTEND_URL", "http://localhost:3000")
@@ -38,6 +97,12 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
+# Compress large JSON responses
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+)
+
 # Add middleware to print request info for debugging
 @app.middleware("http")
 async def log_requests(request, call_next):
@@ -47,8 +112,15 @@ async def log_requests(request, call_next):
     print(f"Response status: {response.status_code}")
     return response
 
+# Per-request query counting and budget warnings
+app.middleware("http")(track_queries)
+
+# Opt-in request profiling, off unless PROFILE_ADMIN_TOKEN or PROFILE_SAMPLE_RATE is set
+app.middleware("http")(profile_requests)
+
 # Include routers
 app.include_router(images.router)
+app.include_router(profiles.router)
 
 @app.get("/")
 async def root():
@@ -56,7 +128,16 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
+    return {
+        "status": "healthy",
+        "admission": rate_limit_service.gate.stats(),
+        "circuits": circuit_breaker_service.snapshot(),
+        "http_pool": http_service.stats(),
+        "cleanup": cleanup_service.stats(),
+        "queries": db_instrumentation.top_queries(),
+        "replica": supabase_service.replica_stats(),
+        "startup": getattr(app.state, "startup", None)
+    }
 
 # Endpoints will be implemented here
 
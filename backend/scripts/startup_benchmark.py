@@ -0,0 +1,93 @@
+"""
+Measure cold-start cost of the API
+
+Reports, as one JSON object:
+- import_seconds: time to import main in a fresh interpreter (median of --runs)
+- ready_seconds: time from launching uvicorn until /health answers
+- first_request_seconds / second_request_seconds: latency of the first two calls to --path
+
+Run from the backend directory:
+    python scripts/startup_benchmark.py --runs 5 --output startup.jsonl
+Appending to a file with --output lets results be compared across commits.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def measure_import(runs: int) -> float:
+    code = "import time; t = time.perf_counter(); import main; print(time.perf_counter() - t)"
+    samples = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=BACKEND_DIR,
+            capture_output=True,
+            text=True,
+            check=True
+        )
+        samples.append(float(result.stdout.strip().splitlines()[-1]))
+    return statistics.median(samples)
+
+def timed_get(client: httpx.Client, url: str) -> float:
+    started = time.perf_counter()
+    client.get(url)
+    return time.perf_counter() - started
+
+def measure_first_request(port: int, path: str, timeout: float) -> dict:
+    base_url = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port)],
+        cwd=BACKEND_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    try:
+        with httpx.Client(timeout=timeout) as client:
+            while True:
+                if time.perf_counter() - started > timeout:
+                    raise TimeoutError("Server did not become ready")
+                try:
+                    if client.get(f"{base_url}/health").status_code == 200:
+                        break
+                except httpx.TransportError:
+                    time.sleep(0.05)
+            ready_seconds = time.perf_counter() - started
+            return {
+                "ready_seconds": round(ready_seconds, 3),
+                "first_request_seconds": round(timed_get(client, base_url + path), 3),
+                "second_request_seconds": round(timed_get(client, base_url + path), 3),
+            }
+    finally:
+        server.terminate()
+        server.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3, help="Import timing samples")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--path", default="/images/explore?limit=1", help="Endpoint for first-request latency")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--output", help="Append the result as a JSON line to this file")
+    args = parser.parse_args()
+
+    result = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "import_seconds": round(measure_import(args.runs), 3),
+        **measure_first_request(args.port, args.path, args.timeout),
+    }
+    print(json.dumps(result, indent=2))
+
+    if args.output:
+        with open(args.output, "a") as f:
+            f.write(json.dumps(result) + "\n")
+
+if __name__ == "__main__":
+    main()
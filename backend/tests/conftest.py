@@ -0,0 +1,152 @@
+import os
+import glob
+import time
+import uuid
+import psycopg2
+import pytest
+from typing import Optional
+
+# Database-backed tests run only when this points at a PostgreSQL server.
+# They work in their own schema, which is dropped afterwards.
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+TEST_SCHEMA = "visionary_test"
+# Replica tests also need a streaming standby of that server, connected to as a
+# superuser: they pause replay and disconnect its WAL receiver.
+TEST_REPLICA_DATABASE_URL = os.getenv("TEST_REPLICA_DATABASE_URL")
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "frontend", "prisma", "migrations")
+
+# "Comment" is created by the backend's Supabase setup rather than Prisma
+COMMENT_TABLE = """
+CREATE TABLE "Comment" (
+    "id" TEXT NOT NULL PRIMARY KEY,
+    "imageId" TEXT NOT NULL,
+    "userId" TEXT NOT NULL,
+    "userName" TEXT NOT NULL,
+    "text" TEXT NOT NULL,
+    "created_at" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+def with_search_path(url: str, schema: str) -> str:
+    """Make every connection opened from url use schema"""
+    separator = "&" if "?" in url else "?"
+    return f"{url}{separator}options=-csearch_path%3D{schema}"
+
+def create_schema(url: str, schema: str):
+    """Recreate schema with the Prisma migrations applied"""
+    conn = psycopg2.connect(url)
+    try:
+        with conn:
+            with conn.cursor() as cur:
+                cur.execute(f'DROP SCHEMA IF EXISTS "{schema}" CASCADE')
+                cur.execute(f'CREATE SCHEMA "{schema}"')
+                cur.execute(f'SET search_path TO "{schema}"')
+                for path in sorted(glob.glob(os.path.join(MIGRATIONS_DIR, "*", "migration.sql"))):
+                    with open(path) as f:
+                        cur.execute(f.read())
+                cur.execute(COMMENT_TABLE)
+    finally:
+        conn.close()
+
+def drop_schema(url: str, schema: str):
+    conn = psycopg2.connect(url)
+    try:
+        with conn:
+            with conn.cursor() as cur:
+                cur.execute(f'DROP SCHEMA IF EXISTS "{schema}" CASCADE')
+    finally:
+        conn.close()
+
+@pytest.fixture(scope="session")
+def database_url():
+    """The test schema's connection URL, with the service's pool pointed at it"""
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    from app.services import supabase_service
+
+    create_schema(TEST_DATABASE_URL, TEST_SCHEMA)
+    url = with_search_path(TEST_DATABASE_URL, TEST_SCHEMA)
+    previous = os.environ.get("DATABASE_URL")
+    os.environ["DATABASE_URL"] = url
+    supabase_service.close_pool()
+    yield url
+    supabase_service.close_pool()
+    if previous is None:
+        os.environ.pop("DATABASE_URL", None)
+    else:
+        os.environ["DATABASE_URL"] = previous
+    drop_schema(TEST_DATABASE_URL, TEST_SCHEMA)
+
+@pytest.fixture
+def db(database_url):
+    """A connection to the emptied test schema, for seeding and inspecting data"""
+    conn = psycopg2.connect(database_url)
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        cur.execute("SELECT tablename FROM pg_tables WHERE schemaname = %s", (TEST_SCHEMA,))
+        tables = ", ".join(f'"{row[0]}"' for row in cur.fetchall() if row[0] != "_prisma_migrations")
+        cur.execute(f"TRUNCATE {tables}")
+    yield conn
+    conn.close()
+
+@pytest.fixture
+def replica(db, monkeypatch):
+    """An autocommit connection to the standby, with reads routed to it"""
+    if not TEST_REPLICA_DATABASE_URL:
+        pytest.skip("TEST_REPLICA_DATABASE_URL is not set")
+    from app.services import supabase_service
+
+    supabase_service.close_pool()
+    monkeypatch.setattr(supabase_service, "REPLICA_URL", with_search_path(TEST_REPLICA_DATABASE_URL, TEST_SCHEMA))
+    monkeypatch.setattr(supabase_service, "_replica", supabase_service.ReplicaState())
+    monkeypatch.setattr(supabase_service, "_pinned_to_primary", {})
+    conn = psycopg2.connect(TEST_REPLICA_DATABASE_URL)
+    conn.autocommit = True
+    yield conn
+    with conn.cursor() as cur:
+        cur.execute("SELECT pg_wal_replay_resume()")
+    conn.close()
+    supabase_service.close_pool()
+
+def wait_for_replica(db, replica, timeout: float = 10):
+    """Wait until the standby has replayed everything written on the primary so far"""
+    with db.cursor() as cur:
+        cur.execute("SELECT pg_current_wal_lsn()")
+        position = cur.fetchone()[0]
+    deadline = time.monotonic() + timeout
+    with replica.cursor() as cur:
+        while True:
+            cur.execute("SELECT pg_last_wal_replay_lsn() >= %s::pg_lsn", (position,))
+            if cur.fetchone()[0]:
+                return
+            if time.monotonic() > deadline:
+                raise TimeoutError("The standby did not catch up")
+            time.sleep(0.05)
+
+def seed_user(db, name: str = "Ann") -> dict:
+    user = {"id": str(uuid.uuid4()), "name": name, "email": f"{name.lower()}-{uuid.uuid4().hex[:6]}@example.com"}
+    with db.cursor() as cur:
+        cur.execute(
+            'INSERT INTO "User" (id, name, email) VALUES (%s, %s, %s)',
+            (user["id"], user["name"], user["email"])
+        )
+    return user
+
+def seed_image(db, user_id: str, likes: int = 0, image_url: Optional[str] = None) -> str:
+    image_id = str(uuid.uuid4())
+    image_url = image_url or f"https://res.cloudinary.com/demo/image/upload/v1/ai-images/{image_id}.png"
+    with db.cursor() as cur:
+        cur.execute(
+            'INSERT INTO "Image" (id, "userId", prompt, image_url, likes) VALUES (%s, %s, %s, %s, %s)',
+            (image_id, user_id, "a prompt", image_url, likes)
+        )
+    return image_id
+
+def seed_comment(db, image_id: str, user_id: str, text: str = "Nice") -> str:
+    comment_id = str(uuid.uuid4())
+    with db.cursor() as cur:
+        cur.execute(
+            'INSERT INTO "Comment" (id, "imageId", "userId", "userName", text) VALUES (%s, %s, %s, %s, %s)',
+            (comment_id, image_id, user_id, "Ann", text)
+        )
+    return comment_id
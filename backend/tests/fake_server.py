@@ -0,0 +1,37 @@
+import asyncio
+import httpx
+from typing import Optional
+
+class FaultInjectingServer:
+    """
+    An in-process stand-in for an upstream API that fails or stalls on demand.
+    Point a service at it by swapping http_service.get_client for client().
+    """
+
+    def __init__(self):
+        self.status_code = 200
+        self.delay = 0.0
+        self.requests = 0
+        self.last_request: Optional[httpx.Request] = None
+
+    def healthy(self):
+        self.status_code = 200
+        self.delay = 0.0
+
+    def failing(self, status_code: int = 503):
+        self.status_code = status_code
+        self.delay = 0.0
+
+    def slow(self, delay: float):
+        self.status_code = 200
+        self.delay = delay
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        self.last_request = request
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return httpx.Response(self.status_code, content=b"image-bytes")
+
+    def client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=httpx.MockTransport(self.handle))
@@ -0,0 +1,218 @@
+import asyncio
+import time
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from app.services import circuit_breaker_service, cloudinary_service, http_service, openai_service
+from app.services.circuit_breaker_service import CircuitBreaker, CircuitOpenError, hedged, CLOSED, OPEN, HALF_OPEN
+from tests.fake_server import FaultInjectingServer
+
+IMAGE_URL = "https://images.example.com/a.png"
+
+@pytest.fixture
+def server(monkeypatch):
+    server = FaultInjectingServer()
+    client = server.client()
+    monkeypatch.setattr(http_service, "get_client", lambda: client)
+    return server
+
+@pytest.fixture
+def breaker(monkeypatch):
+    breaker = CircuitBreaker(
+        "image_download",
+        timeout=0.2,
+        slow_call_seconds=0.1,
+        window_size=4,
+        min_calls=4,
+        open_seconds=0.05
+    )
+    monkeypatch.setattr(cloudinary_service, "download_breaker", breaker)
+    return breaker
+
+async def _download(times: int):
+    """Download IMAGE_URL times, returning the errors raised"""
+    errors = []
+    for _ in range(times):
+        try:
+            await cloudinary_service.download_image(IMAGE_URL)
+        except Exception as e:
+            errors.append(e)
+    return errors
+
+def test_server_errors_open_then_trial_call_closes(server, breaker):
+    async def scenario():
+        server.failing(503)
+        errors = await _download(4)
+        assert all(isinstance(e, httpx.HTTPStatusError) for e in errors)
+        assert breaker.state == OPEN
+
+        # Open: fails fast without reaching the server
+        requests = server.requests
+        errors = await _download(1)
+        assert isinstance(errors[0], CircuitOpenError)
+        assert server.requests == requests
+
+        # A failed trial call re-opens it
+        await asyncio.sleep(0.06)
+        await _download(1)
+        assert breaker.state == OPEN
+
+        # A healthy trial call closes it
+        await asyncio.sleep(0.06)
+        server.healthy()
+        assert await _download(1) == []
+        assert breaker.state == CLOSED
+
+    asyncio.run(scenario())
+
+def test_client_errors_do_not_open(server, breaker):
+    async def scenario():
+        server.failing(404)
+        responses = [await cloudinary_service.download_image(IMAGE_URL) for _ in range(6)]
+        assert all(response.status_code == 404 for response in responses)
+        assert breaker.state == CLOSED
+
+    asyncio.run(scenario())
+
+def test_slow_calls_and_timeouts_open(server, breaker):
+    async def scenario():
+        server.slow(0.12)
+        assert await _download(4) == []
+        assert breaker.state == OPEN
+
+        await asyncio.sleep(0.06)
+        server.slow(0.5)
+        errors = await _download(1)
+        assert isinstance(errors[0], asyncio.TimeoutError)
+        assert breaker.state == OPEN
+
+    asyncio.run(scenario())
+
+def test_half_open_allows_limited_trial_calls(server, breaker):
+    async def scenario():
+        server.failing(503)
+        await _download(4)
+        await asyncio.sleep(0.06)
+
+        server.slow(0.05)
+        results = await asyncio.gather(
+            cloudinary_service.download_image(IMAGE_URL),
+            cloudinary_service.download_image(IMAGE_URL),
+            return_exceptions=True
+        )
+        assert isinstance(results[1], CircuitOpenError)
+        assert not isinstance(results[0], Exception)
+        assert breaker.state == CLOSED
+
+    asyncio.run(scenario())
+
+@pytest.fixture
+def openai_breaker(server, monkeypatch):
+    breaker = CircuitBreaker("openai", timeout=10, slow_call_seconds=1, window_size=4, min_calls=4)
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setattr(openai_service, "breaker", breaker)
+    monkeypatch.setattr(openai_service, "_client", None)
+    yield breaker
+    openai_service.close()
+
+def test_rejected_prompts_do_not_open_openai_breaker(server, openai_breaker):
+    async def scenario():
+        server.failing(400)
+        for _ in range(6):
+            assert await openai_service.generate_image("a rejected prompt") is None
+        assert openai_breaker.state == CLOSED
+        assert server.requests == 6
+
+    asyncio.run(scenario())
+
+@pytest.mark.parametrize("status_code", [429, 500])
+def test_openai_overload_and_server_errors_open(server, openai_breaker, status_code):
+    async def scenario():
+        server.failing(status_code)
+        for _ in range(4):
+            await openai_service.generate_image("a prompt")
+        assert openai_breaker.state == OPEN
+
+    asyncio.run(scenario())
+
+def test_calls_keep_the_pool_connect_timeout(server, openai_breaker):
+    async def scenario():
+        await cloudinary_service.download_image(IMAGE_URL)
+        timeout = server.last_request.extensions["timeout"]
+        assert timeout["connect"] == http_service.CONNECT_TIMEOUT
+        assert timeout["read"] == cloudinary_service.download_breaker.timeout
+
+        await openai_service.generate_image("a prompt")
+        timeout = server.last_request.extensions["timeout"]
+        assert timeout["connect"] == http_service.CONNECT_TIMEOUT
+        assert timeout["read"] == openai_breaker.timeout
+
+    asyncio.run(scenario())
+
+def test_late_results_do_not_extend_open_window():
+    breaker = CircuitBreaker("test", timeout=1, slow_call_seconds=1, window_size=4, min_calls=4)
+    for _ in range(4):
+        breaker._record(True, 0.0)
+    assert breaker.state == OPEN
+    opened_at = breaker.opened_at
+
+    time.sleep(0.01)
+    breaker._record(True, 0.0)  # A call that was already in flight
+    assert breaker.opened_at == opened_at
+
+def test_allow_moves_open_to_half_open_after_wait():
+    breaker = CircuitBreaker("test", timeout=1, slow_call_seconds=1, min_calls=1, open_seconds=0.01)
+    breaker._record(True, 0.0)
+    assert not breaker._allow()
+    time.sleep(0.02)
+    assert breaker._allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker._allow()
+
+def test_hedged_returns_fastest_attempt():
+    delays = [0.5, 0.0]
+    cancelled = []
+
+    async def attempt():
+        delay = delays.pop(0)
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            cancelled.append(delay)
+            raise
+        return delay
+
+    async def scenario():
+        started = time.monotonic()
+        assert await hedged(attempt, delay=0.02) == 0.0
+        assert time.monotonic() - started < 0.3
+        await asyncio.sleep(0)
+        assert cancelled == [0.5]
+
+    asyncio.run(scenario())
+
+def test_hedged_retries_failure_then_raises_last_error():
+    calls = []
+
+    async def attempt():
+        calls.append(None)
+        raise ValueError(f"attempt {len(calls)}")
+
+    with pytest.raises(ValueError, match="attempt 2"):
+        asyncio.run(hedged(attempt, delay=1.0))
+    assert len(calls) == 2
+
+def test_open_breaker_returns_503_with_retry_after(monkeypatch):
+    import main
+
+    breaker = circuit_breaker_service.get_breaker("image_download")
+    monkeypatch.setattr(breaker, "state", OPEN)
+    monkeypatch.setattr(breaker, "opened_at", time.monotonic())
+
+    response = TestClient(main.app).post(
+        "/images/upload",
+        json={"image_url": IMAGE_URL},
+        headers={"user-id": "breaker-test@example.com"}
+    )
+    assert response.status_code == 503
+    assert int(response.headers["Retry-After"]) >= 1
@@ -0,0 +1,86 @@
+import asyncio
+from app.services import cleanup_service, cloudinary_service, supabase_service
+from tests.conftest import seed_user, seed_image, seed_comment
+
+def _count(db, query: str, *params) -> int:
+    with db.cursor() as cur:
+        cur.execute(query, params)
+        return cur.fetchone()[0]
+
+def test_deleting_an_image_queues_its_asset_and_comments(db, monkeypatch):
+    monkeypatch.setenv("CLOUDINARY_CLOUD_NAME", "demo")
+    deleted_assets = []
+
+    async def delete_images(public_ids):
+        deleted_assets.extend(public_ids)
+        return {public_id: True for public_id in public_ids}
+
+    monkeypatch.setattr(cloudinary_service, "delete_images", delete_images)
+
+    user = seed_user(db)
+    image_id = seed_image(db, user["id"])
+    kept_image_id = seed_image(db, user["id"])
+    seed_comment(db, image_id, user["id"])
+    seed_comment(db, image_id, user["id"])
+    seed_comment(db, kept_image_id, user["id"])
+
+    assert asyncio.run(supabase_service.delete_image(image_id, user["id"]))
+    assert _count(db, 'SELECT COUNT(*) FROM "DeletedImage" WHERE image_id = %s', image_id) == 1
+
+    asyncio.run(cleanup_service.run_once())
+
+    assert deleted_assets == [f"ai-images/{image_id}"]
+    assert _count(db, 'SELECT COUNT(*) FROM "CleanupOutbox"') == 0
+    assert _count(db, 'SELECT COUNT(*) FROM "DeletedImage"') == 0
+    assert _count(db, 'SELECT COUNT(*) FROM "Comment" WHERE "imageId" = %s', image_id) == 0
+    assert _count(db, 'SELECT COUNT(*) FROM "Comment" WHERE "imageId" = %s', kept_image_id) == 1
+
+def test_full_orphan_scan_runs_only_once_per_interval(db, monkeypatch):
+    scans = []
+    sweep = supabase_service.sweep_orphaned_comments
+
+    def counting_sweep(batch_size):
+        scans.append(batch_size)
+        return sweep(batch_size)
+
+    monkeypatch.setattr(supabase_service, "sweep_orphaned_comments", counting_sweep)
+    monkeypatch.setattr(cleanup_service.metrics, "last_orphan_scan_at", None)
+
+    user = seed_user(db)
+    # A comment on an image that was never recorded in "DeletedImage"
+    seed_comment(db, "missing-image", user["id"])
+
+    asyncio.run(cleanup_service.sweep_comments())
+    asyncio.run(cleanup_service.sweep_comments())
+
+    assert len(scans) == 1
+    assert _count(db, 'SELECT COUNT(*) FROM "Comment"') == 0
+
+def test_assets_shared_with_another_image_are_kept(db, monkeypatch):
+    monkeypatch.setenv("CLOUDINARY_CLOUD_NAME", "demo")
+    deleted_assets = []
+
+    async def delete_images(public_ids):
+        deleted_assets.extend(public_ids)
+        return {public_id: True for public_id in public_ids}
+
+    monkeypatch.setattr(cloudinary_service, "delete_images", delete_images)
+
+    owner = seed_user(db, "Owner")
+    copier = seed_user(db, "Copier")
+    url = "https://res.cloudinary.com/demo/image/upload/v1/ai-images/shared.png"
+    original = seed_image(db, owner["id"], image_url=url)
+    copy = seed_image(db, copier["id"], image_url=url)
+
+    assert asyncio.run(supabase_service.delete_image(copy, copier["id"]))
+    assert _count(db, 'SELECT COUNT(*) FROM "CleanupOutbox"') == 0
+
+    # Once the last image using it is gone, the asset is queued
+    assert asyncio.run(supabase_service.delete_image(original, owner["id"]))
+    assert _count(db, 'SELECT COUNT(*) FROM "CleanupOutbox"') == 1
+
+    # Saved again before the worker got to it: dropped from the queue, not deleted
+    seed_image(db, copier["id"], image_url=url)
+    asyncio.run(cleanup_service.drain_assets())
+    assert deleted_assets == []
+    assert _count(db, 'SELECT COUNT(*) FROM "CleanupOutbox"') == 0
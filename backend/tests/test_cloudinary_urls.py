@@ -0,0 +1,22 @@
+import pytest
+from app.utils.cloudinary_urls import public_id_from_url
+
+@pytest.fixture(autouse=True)
+def cloud_name(monkeypatch):
+    monkeypatch.setenv("CLOUDINARY_CLOUD_NAME", "demo")
+
+@pytest.mark.parametrize("url, public_id", [
+    ("https://res.cloudinary.com/demo/image/upload/v1712345678/ai-images/abc.png", "ai-images/abc"),
+    ("https://res.cloudinary.com/demo/image/upload/ai-images/abc.png", "ai-images/abc"),
+    ("https://res.cloudinary.com/demo/image/upload/c_fill,w_200/v1/ai-images/abc.jpg", "ai-images/abc"),
+    ("https://res.cloudinary.com/demo/image/upload/v1/my%20folder/a.b.png", "my folder/a.b"),
+    ("https://res.cloudinary.com/other/image/upload/v1/ai-images/abc.png", None),
+    ("https://oaidalleapiprodscus.blob.core.windows.net/private/img.png", None),
+    ("https://res.cloudinary.com/demo/image/upload/v1/", None),
+])
+def test_public_id_from_url(url, public_id):
+    assert public_id_from_url(url) == public_id
+
+def test_needs_a_cloud_name(monkeypatch):
+    monkeypatch.delenv("CLOUDINARY_CLOUD_NAME")
+    assert public_id_from_url("https://res.cloudinary.com/demo/image/upload/v1/a.png") is None
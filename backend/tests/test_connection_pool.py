@@ -0,0 +1,30 @@
+import asyncio
+from app.services import supabase_service
+from tests.conftest import seed_user, seed_image
+
+def _terminate(db, pid: int):
+    with db.cursor() as cur:
+        cur.execute("SELECT pg_terminate_backend(%s)", (pid,))
+
+def test_dropped_idle_connections_are_replaced(db, monkeypatch):
+    user = seed_user(db)
+    seed_image(db, user["id"])
+    monkeypatch.setattr(supabase_service, "VALIDATE_IDLE_SECONDS", 0)
+
+    # Park two connections in the pool, then drop them server-side
+    with supabase_service.get_connection() as first:
+        with supabase_service.get_connection() as second:
+            pids = [first.get_backend_pid(), second.get_backend_pid()]
+    for pid in pids:
+        _terminate(db, pid)
+
+    images = asyncio.run(supabase_service.get_explore_images())
+    assert len(images) == 1
+
+def test_recently_used_connections_skip_the_check(db, monkeypatch):
+    monkeypatch.setattr(supabase_service, "VALIDATE_IDLE_SECONDS", 3600)
+    with supabase_service.get_connection() as conn:
+        pid = conn.get_backend_pid()
+    with supabase_service.get_connection() as conn:
+        assert conn.get_backend_pid() == pid
+
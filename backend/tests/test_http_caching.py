@@ -0,0 +1,65 @@
+from datetime import datetime, timezone
+from fastapi import FastAPI, Request, Response
+from fastapi.testclient import TestClient
+from app.middleware import compression
+from app.middleware.compression import choose_encoding
+from app.services import etag_service
+from app.services.etag_service import make_etag, _etag_matches, _not_modified_since
+
+def test_make_etag_is_stable_and_quoted():
+    etag = make_etag("image", "1", 3)
+    assert etag == make_etag("image", "1", 3)
+    assert etag != make_etag("image", "1", 4)
+    assert etag.startswith('"') and etag.endswith('"')
+
+def test_etag_matching():
+    etag = make_etag("image", "1")
+    assert _etag_matches(etag, etag)
+    assert _etag_matches(f'"other", {etag}', etag)
+    assert _etag_matches(f"W/{etag}", etag)
+    assert _etag_matches("*", etag)
+    assert not _etag_matches('"other"', etag)
+
+def test_not_modified_since():
+    last_modified = datetime(2026, 10, 18, 12, 0, 0, 500000)
+    assert _not_modified_since("Sun, 18 Oct 2026 12:00:00 GMT", last_modified)
+    assert not _not_modified_since("Sun, 18 Oct 2026 11:59:59 GMT", last_modified)
+    assert _not_modified_since("Sun, 18 Oct 2026 12:00:00 GMT", last_modified.replace(tzinfo=timezone.utc))
+    assert not _not_modified_since("garbage", last_modified)
+
+def test_choose_encoding(monkeypatch):
+    monkeypatch.setattr(compression, "BROTLI_AVAILABLE", True)
+    assert choose_encoding("gzip, deflate, br") == "br"
+    assert choose_encoding("gzip;q=1.0, br;q=0.5") == "gzip"
+    assert choose_encoding("br;q=0, gzip;q=0") is None
+    assert choose_encoding("*") == "br"
+    assert choose_encoding("identity") is None
+    assert choose_encoding("") is None
+
+def test_choose_encoding_without_brotli(monkeypatch):
+    monkeypatch.setattr(compression, "BROTLI_AVAILABLE", False)
+    assert choose_encoding("br, gzip") == "gzip"
+    assert choose_encoding("br") is None
+
+def test_compressed_responses_carry_a_weak_etag():
+    app = FastAPI()
+    app.add_middleware(compression.CompressionMiddleware, minimum_size=10)
+
+    @app.get("/payload")
+    async def payload(request: Request, response: Response):
+        not_modified = etag_service.check_not_modified(request, response, make_etag("payload"))
+        if not_modified:
+            return not_modified
+        return {"data": "x" * 100}
+
+    client = TestClient(app)
+    identity = client.get("/payload", headers={"Accept-Encoding": "identity"})
+    assert identity.headers["ETag"] == make_etag("payload")
+
+    compressed = client.get("/payload", headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert compressed.headers["ETag"] == f"W/{make_etag('payload')}"
+
+    revalidated = client.get("/payload", headers={"Accept-Encoding": "gzip", "If-None-Match": compressed.headers["ETag"]})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["ETag"] == compressed.headers["ETag"]
@@ -0,0 +1,16 @@
+from datetime import datetime
+from app.services.supabase_service import encode_cursor, decode_cursor
+
+def test_cursor_round_trip():
+    created_at = datetime(2026, 10, 18, 12, 30, 5, 123000)
+    cursor = encode_cursor(created_at, "image-1")
+    assert decode_cursor(cursor) == (created_at, "image-1")
+
+def test_cursor_is_url_safe():
+    cursor = encode_cursor(datetime(2026, 1, 1), "a/b+c?d")
+    assert all(c.isalnum() or c in "-_=" for c in cursor)
+
+def test_malformed_cursor_is_rejected():
+    assert decode_cursor("not-a-cursor") is None
+    assert decode_cursor("") is None
+    assert decode_cursor(encode_cursor(datetime(2026, 1, 1), "x")[:-4]) is None
@@ -0,0 +1,67 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.services import profiling_service
+from app.services.profiling_service import SAMPLE, DETERMINISTIC
+from app.services.rate_limit_service import TokenBucket
+
+TOKEN = "secret-token"
+
+@pytest.fixture(autouse=True)
+def admin_token(monkeypatch, tmp_path):
+    monkeypatch.setattr(profiling_service, "ADMIN_TOKEN", TOKEN)
+    monkeypatch.setattr(profiling_service, "SAMPLE_RATE", 0)
+    monkeypatch.setattr(profiling_service, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(profiling_service, "_budget", TokenBucket(100, 100))
+
+def test_is_admin():
+    assert profiling_service.is_admin(TOKEN)
+    assert not profiling_service.is_admin("wrong")
+    assert not profiling_service.is_admin(None)
+
+def test_only_admins_choose_a_mode():
+    assert profiling_service.choose_mode(DETERMINISTIC, TOKEN) == DETERMINISTIC
+    assert profiling_service.choose_mode(SAMPLE, TOKEN) == SAMPLE
+    assert profiling_service.choose_mode(DETERMINISTIC, "wrong") is None
+
+def test_deterministic_falls_back_to_sampling_while_busy(monkeypatch):
+    with profiling_service.tracking_request():
+        assert profiling_service.choose_mode(DETERMINISTIC, TOKEN) == SAMPLE
+        monkeypatch.setattr(profiling_service, "SAMPLING_AVAILABLE", False)
+        assert profiling_service.choose_mode(DETERMINISTIC, TOKEN) is None
+
+def test_sampled_traffic_is_never_deterministic(monkeypatch):
+    monkeypatch.setattr(profiling_service, "SAMPLE_RATE", 1.0)
+    assert profiling_service.choose_mode(None, None) == SAMPLE
+    monkeypatch.setattr(profiling_service, "SAMPLING_AVAILABLE", False)
+    assert profiling_service.choose_mode(None, None) is None
+
+@pytest.mark.parametrize("mode", [SAMPLE, DETERMINISTIC])
+def test_profiled_request_returns_profile_id(mode):
+    import main
+
+    response = TestClient(main.app).get("/", headers={"X-Profile": mode, "X-Profile-Token": TOKEN})
+    assert response.status_code == 200
+    name = response.headers["X-Profile-Id"]
+    assert profiling_service.get_profile_path(name)
+
+def test_failing_to_save_a_profile_keeps_the_response(monkeypatch):
+    import main
+
+    def stop(self):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(profiling_service.RequestProfile, "stop", stop)
+    response = TestClient(main.app).get("/", headers={"X-Profile": SAMPLE, "X-Profile-Token": TOKEN})
+    assert response.status_code == 200
+    assert "X-Profile-Id" not in response.headers
+
+def test_failing_to_start_a_profile_keeps_the_response(monkeypatch):
+    import main
+
+    def start(self):
+        raise RuntimeError("There is already a profiler running")
+
+    monkeypatch.setattr(profiling_service.RequestProfile, "start", start)
+    response = TestClient(main.app).get("/", headers={"X-Profile": SAMPLE, "X-Profile-Token": TOKEN})
+    assert response.status_code == 200
+    assert "X-Profile-Id" not in response.headers
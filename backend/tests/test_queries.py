@@ -0,0 +1,96 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.services import db_instrumentation, supabase_service
+from app.services.db_instrumentation import assert_max_queries, query_name
+from tests.conftest import seed_user, seed_image, seed_comment
+
+def _client():
+    import main
+    return TestClient(main.app)
+
+def test_query_name():
+    assert query_name('SELECT * FROM "Image" WHERE id = %s', "get_image_by_id") == "get_image_by_id:SELECT Image"
+    assert query_name('INSERT INTO "Like" ("userId") VALUES (%s)', "like_image") == "like_image:INSERT Like"
+    assert query_name("SELECT 1", "warm_up") == "warm_up:SELECT"
+
+def test_query_name_skips_subqueries():
+    sql = """
+    SELECT i.*, (SELECT COUNT(*) FROM "Comment" c WHERE c."imageId" = i.id) AS comment_count
+    FROM "Image" i
+    WHERE i.id = %s
+    """
+    assert query_name(sql, "get_image_detail") == "get_image_detail:SELECT Image"
+    sql = '''UPDATE "UserStats" s SET most_liked_image_id = top.id FROM (SELECT id FROM "Image") top'''
+    assert query_name(sql, "refresh") == "refresh:UPDATE UserStats"
+    assert query_name("SELECT ')' FROM \"Like\"", "odd") == "odd:SELECT Like"
+
+def test_explore_is_one_query(db):
+    user = seed_user(db)
+    for _ in range(3):
+        seed_image(db, user["id"])
+
+    with assert_max_queries(1):
+        response = _client().get("/images/explore")
+    assert response.status_code == 200
+    assert len(response.json()) == 3
+
+def test_image_detail_is_one_query(db):
+    user = seed_user(db)
+    image_id = seed_image(db, user["id"])
+    seed_comment(db, image_id, user["id"])
+    with db.cursor() as cur:
+        cur.execute('INSERT INTO "Like" (id, "userId", "imageId") VALUES (%s, %s, %s)', ("like-1", user["id"], image_id))
+
+    with assert_max_queries(1) as queries:
+        response = _client().get(f"/images/{image_id}/detail", headers={"user-id": user["email"]})
+    assert [query.name for query in queries] == ["get_image_detail:SELECT Image"]
+    detail = response.json()
+    assert detail["image"]["id"] == image_id
+    assert detail["comment_count"] == 1
+    assert detail["liked"] is True
+
+def test_slow_query_log_omits_bound_values(db, monkeypatch, capsys):
+    user = seed_user(db)
+    monkeypatch.setattr(db_instrumentation, "SLOW_QUERY_MS", 0)
+    monkeypatch.setattr(db_instrumentation, "EXPLAIN_SLOW_QUERIES", False)
+
+    response = _client().get("/images/user/stats", headers={"user-id": user["email"]})
+    assert response.status_code == 200
+    logged = capsys.readouterr().out
+    slow_lines = [line for line in logged.splitlines() if line.startswith("Slow query")]
+    assert slow_lines and not any(user["email"] in line for line in slow_lines)
+
+def test_explained_plans_mask_literals(db, capsys):
+    user = seed_user(db)
+    db_instrumentation._explain("test", f"SELECT id FROM \"User\" WHERE email = '{user['email']}'")
+    plan = capsys.readouterr().out
+    assert "Plan for slow query test" in plan
+    assert user["email"] not in plan
+    assert "'?'" in plan
+
+@pytest.mark.parametrize("path", ["comments", "user"])
+def test_version_and_payload_share_one_connection(db, monkeypatch, path):
+    user = seed_user(db)
+    image_id = seed_image(db, user["id"])
+    seed_comment(db, image_id, user["id"])
+    url = f"/images/{image_id}/comments" if path == "comments" else "/images/user"
+    headers = {"user-id": user["id"]}
+
+    borrowed = []
+    get_read_connection = supabase_service.get_read_connection
+
+    def counting_read_connection(*args, **kwargs):
+        borrowed.append(args)
+        return get_read_connection(*args, **kwargs)
+
+    monkeypatch.setattr(supabase_service, "get_read_connection", counting_read_connection)
+
+    response = _client().get(url, headers=headers)
+    assert response.status_code == 200
+    assert len(borrowed) == 1
+
+    # A match only costs the version query
+    with assert_max_queries(1):
+        revalidated = _client().get(url, headers={**headers, "If-None-Match": response.headers["ETag"]})
+    assert revalidated.status_code == 304
+    assert len(borrowed) == 2
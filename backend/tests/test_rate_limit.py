@@ -0,0 +1,56 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from app.services import rate_limit_service
+from app.services.rate_limit_service import TokenBucket, RateLimiter, ConcurrencyGate
+
+def test_bucket_allows_burst_then_reports_wait():
+    bucket = TokenBucket(capacity=2, per_minute=60)
+    assert bucket.try_acquire() == 0
+    assert bucket.try_acquire() == 0
+    assert bucket.try_acquire() == pytest.approx(1.0, abs=0.05)
+
+def test_bucket_refills_over_time_up_to_capacity():
+    bucket = TokenBucket(capacity=2, per_minute=60)
+    bucket.try_acquire()
+    bucket.try_acquire()
+    bucket.updated -= 600
+    assert bucket.try_acquire() == 0
+    assert bucket.tokens == pytest.approx(1.0, abs=0.05)
+
+def test_bucket_refund_is_capped():
+    bucket = TokenBucket(capacity=1, per_minute=1)
+    assert bucket.try_acquire() == 0
+    bucket.refund()
+    bucket.refund()
+    assert bucket.tokens == 1
+
+def test_bucket_with_zero_rate_never_refills():
+    bucket = TokenBucket(capacity=1, per_minute=0)
+    bucket.try_acquire()
+    assert bucket.try_acquire() == 60.0
+
+def test_limiter_keeps_separate_budgets():
+    limiter = RateLimiter({"generate": (1, 1), "upload": (1, 1)})
+    assert limiter.check("generate", "ann") == 0
+    assert limiter.check("generate", "ann") > 0
+    assert limiter.check("generate", "bob") == 0
+    assert limiter.check("upload", "ann") == 0
+
+def test_shed_request_does_not_spend_the_users_token(monkeypatch):
+    limiter = RateLimiter({"generate": (1, 1)})
+    gate = ConcurrencyGate(max_concurrent=1, max_queued=0)
+    gate.in_flight = 1  # Gate full and no queue: every request is shed
+    monkeypatch.setattr(rate_limit_service, "COST_CLASSES", limiter.cost_classes)
+    monkeypatch.setattr(rate_limit_service, "limiter", limiter)
+    monkeypatch.setattr(rate_limit_service, "gate", gate)
+
+    async def request():
+        dependency = rate_limit_service.admit("generate")("ann")
+        await dependency.__anext__()
+
+    with pytest.raises(HTTPException) as shed:
+        asyncio.run(request())
+    assert shed.value.status_code == 429
+    assert shed.value.detail.startswith("Server is busy")
+    assert limiter.buckets[("generate", "ann")].tokens == pytest.approx(1.0)
@@ -0,0 +1,130 @@
+import asyncio
+import time
+import pytest
+from app.models.image import Comment
+from app.services import supabase_service
+from app.services.supabase_service import ReplicaState
+from tests.conftest import seed_user, seed_image, wait_for_replica
+
+@pytest.fixture
+def routing(monkeypatch):
+    """A caught-up replica as seen by the request path, without a database"""
+    state = ReplicaState()
+    state.healthy = True
+    state.caught_up_at = time.monotonic()
+    monkeypatch.setattr(supabase_service, "REPLICA_URL", "postgresql://replica")
+    monkeypatch.setattr(supabase_service, "_replica", state)
+    monkeypatch.setattr(supabase_service, "_pinned_to_primary", {})
+    monkeypatch.setattr(supabase_service, "_user_ids", {})
+    return state
+
+def test_reads_leave_the_replica_when_checks_stall(routing):
+    assert supabase_service._use_replica(None)
+    routing.caught_up_at = time.monotonic() - supabase_service.REPLICA_MAX_LAG_SECONDS - 1
+    assert not supabase_service._use_replica(None)
+
+def test_unhealthy_replica_is_not_used(routing):
+    routing.healthy = False
+    assert not supabase_service._use_replica(None)
+
+def test_pins_are_per_user(routing):
+    supabase_service.pin_to_primary("user-1")
+    assert not supabase_service._use_replica("user-1")
+    assert supabase_service._use_replica("user-2")
+
+def test_readers_are_pinned_by_id_not_email(routing):
+    supabase_service._user_ids["ann@example.com"] = ("user-1", time.monotonic() + 60)
+    assert asyncio.run(supabase_service._reader_id("ann@example.com")) == "user-1"
+    assert asyncio.run(supabase_service._reader_id("user-1")) == "user-1"
+
+def _pause_replay(replica):
+    with replica.cursor() as cur:
+        cur.execute("SELECT pg_wal_replay_pause()")
+        while True:
+            cur.execute("SELECT pg_get_wal_replay_pause_state()")
+            if cur.fetchone()[0] == "paused":
+                return
+            time.sleep(0.01)
+
+def _write(db):
+    seed_user(db, "Writer")
+
+def test_caught_up_replica_is_healthy(db, replica):
+    _write(db)
+    wait_for_replica(db, replica)
+    supabase_service._check_replica_lag()
+    assert supabase_service._replica.healthy
+    assert supabase_service._replica.lag_seconds < 1
+
+def test_stalled_replay_is_lag_even_when_primary_goes_idle(db, replica, monkeypatch):
+    monkeypatch.setattr(supabase_service, "REPLICA_MAX_LAG_SECONDS", 0.3)
+    wait_for_replica(db, replica)
+    supabase_service._check_replica_lag()
+    _pause_replay(replica)
+    _write(db)
+
+    # Nothing more is written, yet the replica falls further behind
+    supabase_service._check_replica_lag()
+    time.sleep(0.4)
+    supabase_service._check_replica_lag()
+    assert not supabase_service._replica.healthy
+    assert supabase_service._replica.lag_seconds > 0.3
+
+def test_disconnected_wal_receiver_is_unhealthy(db, replica):
+    with replica.cursor() as cur:
+        cur.execute("SHOW primary_conninfo")
+        conninfo = cur.fetchone()[0]
+        cur.execute("ALTER SYSTEM SET primary_conninfo = ''")
+        cur.execute("SELECT pg_reload_conf()")
+    try:
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            supabase_service._check_replica_lag()
+            if not supabase_service._replica.healthy:
+                break
+            time.sleep(0.1)
+        assert not supabase_service._replica.healthy
+        assert "WAL receiver" in supabase_service._replica.last_error
+    finally:
+        with replica.cursor() as cur:
+            cur.execute("ALTER SYSTEM SET primary_conninfo = %s", (conninfo,))
+            cur.execute("SELECT pg_reload_conf()")
+
+def test_writers_read_their_writes_while_others_read_the_replica(db, replica, monkeypatch):
+    monkeypatch.setattr(supabase_service, "REPLICA_MAX_LAG_SECONDS", 60)
+    owner = seed_user(db, "Owner")
+    fan = seed_user(db, "Fan")
+    other = seed_user(db, "Other")
+    image_id = seed_image(db, owner["id"])
+    wait_for_replica(db, replica)
+    supabase_service._check_replica_lag()
+    _pause_replay(replica)
+
+    # Like with the user's ID, read back with their email, as the frontend does
+    assert asyncio.run(supabase_service.like_image(image_id, fan["id"]))
+    asyncio.run(supabase_service.create_comment(Comment(imageId=image_id, userId=fan["id"], userName="Fan", text="Love it")))
+
+    detail = asyncio.run(supabase_service.get_image_detail(image_id, fan["email"]))
+    assert detail.liked and detail.image.likes == 1
+    assert len(asyncio.run(supabase_service.get_image_comments(image_id, fan["email"]))) == 1
+
+    stale = asyncio.run(supabase_service.get_image_detail(image_id, other["email"]))
+    assert stale.image.likes == 0
+    versions = []
+    comments = asyncio.run(supabase_service.get_image_comments(image_id, other["email"], lambda *version: versions.append(version)))
+    assert comments == [] and versions[0][0] == 0
+    assert supabase_service.replica_stats()["replica_reads"] > 0
+
+def test_monitor_checks_in_the_background(db, replica):
+    async def scenario():
+        supabase_service.start_replica_monitor()
+        try:
+            for _ in range(50):
+                if supabase_service._replica.healthy:
+                    break
+                await asyncio.sleep(0.05)
+        finally:
+            await supabase_service.stop_replica_monitor()
+
+    asyncio.run(scenario())
+    assert supabase_service._replica.healthy
@@ -0,0 +1,101 @@
+import asyncio
+from fastapi.testclient import TestClient
+from app.services import supabase_service
+from tests.conftest import seed_user
+
+def _save(user: dict, n: int = 1) -> list:
+    return [
+        asyncio.run(supabase_service.save_image_metadata(user["email"], f"https://res.cloudinary.com/demo/image/upload/v1/ai-images/{user['id']}-{i}.png", "a prompt"))
+        for i in range(n)
+    ]
+
+def _assert_stats_match(db, user: dict):
+    """Compare the incrementally maintained counters with a fresh aggregate"""
+    with db.cursor() as cur:
+        cur.execute('SELECT COUNT(*), COALESCE(SUM(likes), 0), MAX(likes) FROM "Image" WHERE "userId" = %s', (user["id"],))
+        image_count, total_likes, top_likes = cur.fetchone()
+        cur.execute('SELECT id FROM "Image" WHERE "userId" = %s AND likes = %s', (user["id"], top_likes))
+        top_ids = {row[0] for row in cur.fetchall()}
+
+    stats = asyncio.run(supabase_service.get_user_stats(user["id"]))
+    assert stats.image_count == image_count
+    assert stats.total_likes == total_likes
+    if image_count:
+        # Ties may be held by any of the tied images
+        assert stats.most_liked_image.id in top_ids
+        assert stats.most_liked_image.likes == top_likes
+    else:
+        assert stats.most_liked_image is None
+
+def test_stats_follow_save_like_unlike_and_delete(db):
+    owner = seed_user(db, "Owner")
+    fans = [seed_user(db, f"Fan{i}") for i in range(3)]
+    first, second, third = _save(owner, 3)
+    _assert_stats_match(db, owner)
+
+    for fan in fans[:2]:
+        assert asyncio.run(supabase_service.like_image(first, fan["id"]))
+    assert asyncio.run(supabase_service.like_image(second, fans[2]["id"]))
+    _assert_stats_match(db, owner)
+    assert asyncio.run(supabase_service.get_user_stats(owner["id"])).most_liked_image.id == first
+
+    # Unliking the most-liked image hands the slot to the next one
+    assert asyncio.run(supabase_service.unlike_image(first, fans[0]["id"]))
+    assert asyncio.run(supabase_service.unlike_image(first, fans[1]["id"]))
+    _assert_stats_match(db, owner)
+    assert asyncio.run(supabase_service.get_user_stats(owner["id"])).most_liked_image.id == second
+
+    # So does deleting it
+    assert asyncio.run(supabase_service.like_image(third, fans[0]["id"]))
+    assert asyncio.run(supabase_service.like_image(third, fans[1]["id"]))
+    _assert_stats_match(db, owner)
+    assert asyncio.run(supabase_service.delete_image(third, owner["id"]))
+    _assert_stats_match(db, owner)
+    assert asyncio.run(supabase_service.get_user_stats(owner["id"])).most_liked_image.id == second
+
+    for image_id in (first, second):
+        assert asyncio.run(supabase_service.delete_image(image_id, owner["id"]))
+    _assert_stats_match(db, owner)
+
+def test_repeated_likes_and_unlikes_are_not_counted_twice(db):
+    owner = seed_user(db, "Owner")
+    fan = seed_user(db, "Fan")
+    (image_id,) = _save(owner)
+
+    asyncio.run(supabase_service.like_image(image_id, fan["id"]))
+    asyncio.run(supabase_service.like_image(image_id, fan["id"]))
+    _assert_stats_match(db, owner)
+    asyncio.run(supabase_service.unlike_image(image_id, fan["id"]))
+    asyncio.run(supabase_service.unlike_image(image_id, fan["id"]))
+    _assert_stats_match(db, owner)
+
+def test_user_images_page_through_with_next_cursor(db):
+    import main
+
+    owner = seed_user(db, "Owner")
+    saved = _save(owner, 7)
+    client = TestClient(main.app)
+
+    seen = []
+    cursor = None
+    pages = 0
+    while True:
+        params = {"limit": 3}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/images/user", params=params, headers={"user-id": owner["email"]})
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page) <= 3
+        seen.extend(image["id"] for image in page)
+        pages += 1
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    with db.cursor() as cur:
+        cur.execute('SELECT id FROM "Image" WHERE "userId" = %s ORDER BY created_at DESC, id DESC', (owner["id"],))
+        newest_first = [row[0] for row in cur.fetchall()]
+    assert pages == 3
+    assert sorted(newest_first) == sorted(saved)
+    assert seen == newest_first
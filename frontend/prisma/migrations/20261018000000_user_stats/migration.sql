@@ -0,0 +1,29 @@
+-- CreateTable
+CREATE TABLE "UserStats" (
+    "userId" TEXT NOT NULL,
+    "image_count" INTEGER NOT NULL DEFAULT 0,
+    "total_likes" INTEGER NOT NULL DEFAULT 0,
+    "most_liked_image_id" TEXT,
+    "most_liked_likes" INTEGER NOT NULL DEFAULT 0,
+    "updated_at" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT "UserStats_pkey" PRIMARY KEY ("userId")
+);
+
+-- CreateIndex
+CREATE INDEX "Image_userId_created_at_id_idx" ON "Image"("userId", "created_at" DESC, "id" DESC);
+
+-- CreateIndex
+CREATE INDEX "Image_userId_likes_idx" ON "Image"("userId", "likes" DESC);
+
+-- Backfill aggregates for existing images
+INSERT INTO "UserStats" ("userId", "image_count", "total_likes", "most_liked_image_id", "most_liked_likes")
+SELECT i."userId", COUNT(*), COALESCE(SUM(i."likes"), 0), top."id", COALESCE(top."likes", 0)
+FROM "Image" i
+LEFT JOIN LATERAL (
+    SELECT "id", "likes" FROM "Image"
+    WHERE "userId" = i."userId"
+    ORDER BY "likes" DESC, "created_at" DESC
+    LIMIT 1
+) top ON TRUE
+GROUP BY i."userId", top."id", top."likes";
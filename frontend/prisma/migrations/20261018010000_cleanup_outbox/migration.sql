@@ -0,0 +1,17 @@
+-- CreateTable
+CREATE TABLE "CleanupOutbox" (
+    "id" TEXT NOT NULL,
+    "public_id" TEXT NOT NULL,
+    "attempts" INTEGER NOT NULL DEFAULT 0,
+    "next_attempt_at" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "last_error" TEXT,
+    "created_at" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT "CleanupOutbox_pkey" PRIMARY KEY ("id")
+);
+
+-- CreateIndex
+CREATE UNIQUE INDEX "CleanupOutbox_public_id_key" ON "CleanupOutbox"("public_id");
+
+-- CreateIndex
+CREATE INDEX "CleanupOutbox_next_attempt_at_idx" ON "CleanupOutbox"("next_attempt_at");
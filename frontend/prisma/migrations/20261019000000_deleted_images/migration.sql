@@ -0,0 +1,7 @@
+-- CreateTable
+CREATE TABLE "DeletedImage" (
+    "image_id" TEXT NOT NULL,
+    "deleted_at" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT "DeletedImage_pkey" PRIMARY KEY ("image_id")
+);
@@ -0,0 +1,5 @@
+-- AlterTable
+ALTER TABLE "CleanupOutbox" ADD COLUMN "image_url" TEXT;
+
+-- CreateIndex
+CREATE INDEX "Image_image_url_idx" ON "Image"("image_url");
@@ -21,12 +21,18 @@ export async function GET(
     const backendUrl = getApiUrl();
     console.log(`Fetching comments from: ${backendUrl}/images/${imageId}/comments`);
     
+    const session = await getServerSession(authOptions);
+    const headers: Record<string, string> = {
+      'Content-Type': 'application/json',
+      'Accept': 'application/json',
+    };
+    if (session?.user?.email) {
+      headers['user-id'] = session.user.email;
+    }
+
     const response = await fetch(`${backendUrl}/images/${imageId}/comments`, {
       method: 'GET',
-      headers: {
-        'Content-Type': 'application/json',
-        'Accept': 'application/json',
-      },
+      headers,
       next: { revalidate: 0 }
     });
     
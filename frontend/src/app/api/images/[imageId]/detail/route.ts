@@ -0,0 +1,59 @@
+import { NextRequest, NextResponse } from 'next/server';
+import { getServerSession } from 'next-auth';
+import { authOptions } from '@/lib/auth';
+import { getApiUrl } from '@/lib/utils';
+
+// GET /api/images/[imageId]/detail
+// The image, its first page of comments, the comment count and the viewer's liked flag
+export async function GET(
+  request: NextRequest,
+  context: { params: { imageId: string } }
+) {
+  try {
+    const imageId = context.params.imageId;
+    if (!imageId) {
+      return NextResponse.json(
+        { error: 'Image ID is required' },
+        { status: 400 }
+      );
+    }
+
+    const session = await getServerSession(authOptions);
+    const headers: Record<string, string> = {
+      'Content-Type': 'application/json',
+      'Accept': 'application/json',
+    };
+    if (session?.user?.email) {
+      headers['user-id'] = session.user.email;
+    }
+
+    const backendUrl = getApiUrl();
+    const response = await fetch(`${backendUrl}/images/${imageId}/detail`, {
+      method: 'GET',
+      headers,
+      next: { revalidate: 0 }
+    });
+
+    if (response.status === 404) {
+      return NextResponse.json(
+        { error: 'Image not found' },
+        { status: 404 }
+      );
+    }
+
+    if (!response.ok) {
+      const errorText = await response.text();
+      console.error(`Error response from backend: ${response.status} - ${errorText}`);
+      throw new Error(`Failed to fetch image detail: ${response.status}`);
+    }
+
+    const data = await response.json();
+    return NextResponse.json(data);
+  } catch (error) {
+    console.error('Error fetching image detail:', error);
+    return NextResponse.json(
+      { error: 'Failed to fetch image' },
+      { status: 500 }
+    );
+  }
+}
@@ -25,6 +25,8 @@ export default function DashboardPage() {
   const [images, setImages] = useState<ImageData[]>([]);
   const [likedImages, setLikedImages] = useState<string[]>([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const { data: session, status } = useSession();
   const { toast } = useToast();
   const router = useRouter();
@@ -57,11 +59,12 @@ export default function DashboardPage() {
     }
   }, [session?.user?.email]);
 
-  const fetchUserImages = useCallback(async () => {
+  const fetchUserImages = useCallback(async (cursor?: string) => {
     if (!session?.user?.email) return;
       
     try {
-      const response = await fetch(`${process.env.NEXT_PUBLIC_API_URL}/images/user`, {
+      const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : '';
+      const response = await fetch(`${process.env.NEXT_PUBLIC_API_URL}/images/user${query}`, {
         headers: {
           'user-id': session?.user?.email || '',
         },
@@ -72,7 +75,8 @@ export default function DashboardPage() {
       }
 
       const data = await response.json();
-      setImages(data);
+      setImages(prev => cursor ? [...prev, ...data] : data);
+      setNextCursor(response.headers.get('X-Next-Cursor'));
     } catch (error) {
       console.error('Error fetching images:', error);
       toast({
@@ -85,6 +89,13 @@ export default function DashboardPage() {
     }
   }, [session?.user?.email, toast]);
 
+  const loadMoreImages = async () => {
+    if (!nextCursor || loadingMore) return;
+    setLoadingMore(true);
+    await fetchUserImages(nextCursor);
+    setLoadingMore(false);
+  };
+
   useEffect(() => {
     const fetchUserData = async () => {
       if (status !== "authenticated") return;
@@ -299,6 +310,18 @@ export default function DashboardPage() {
             ))}
           </div>
         )}
+
+        {nextCursor && (
+          <div className="flex justify-center mt-10">
+            <button
+              onClick={loadMoreImages}
+              disabled={loadingMore}
+              className="inline-flex h-10 items-center justify-center rounded-md border border-purple-300 dark:border-purple-700 px-6 text-sm font-medium text-purple-700 dark:text-purple-300 hover:bg-purple-50 dark:hover:bg-purple-900/30 transition-colors disabled:opacity-50"
+            >
+              {loadingMore ? "Loading..." : "Load more creations"}
+            </button>
+          </div>
+        )}
       </main>
     </div>
   );
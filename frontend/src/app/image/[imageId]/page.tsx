@@ -62,29 +62,24 @@ export default function ImagePage() {
   const [newComment, setNewComment] = useState("");
   const [isSubmittingComment, setIsSubmittingComment] = useState(false);
   const [isLoadingComments, setIsLoadingComments] = useState(false);
+  const [commentCount, setCommentCount] = useState(0);
   
-  // Fetch image data when component mounts
+  // Fetch the image, its first comments and the liked flag in one request
   useEffect(() => {
     const fetchImage = async () => {
       try {
         setIsLoading(true);
-        const response = await fetch(`/api/images/${imageId}`);
+        const response = await fetch(`/api/images/${imageId}/detail`);
         
         if (!response.ok) {
           throw new Error('Failed to fetch image');
         }
         
         const data = await response.json();
-        setImage(data);
-        
-        // Check if user liked this image
-        if (session?.user) {
-          const likedResponse = await fetch(`/api/images/liked`);
-          if (likedResponse.ok) {
-            const likedImages = await likedResponse.json();
-            setIsLiked(likedImages.includes(imageId));
-          }
-        }
+        setImage(data.image);
+        setComments(data.comments || []);
+        setCommentCount(data.comment_count || 0);
+        setIsLiked(Boolean(data.liked));
       } catch (error) {
         console.error('Error fetching image:', error);
         toast({
@@ -102,13 +97,7 @@ export default function ImagePage() {
     }
   }, [imageId, session, toast]);
   
-  // Fetch comments when image data is available
-  useEffect(() => {
-    if (image) {
-      fetchComments();
-    }
-  }, [image]);
-  
+  // Load the rest of the comments when there are more than the first page
   const fetchComments = async () => {
     if (!imageId) return;
     
@@ -123,6 +112,7 @@ export default function ImagePage() {
       
       const data = await response.json();
       setComments(data.comments || []);
+      setCommentCount((data.comments || []).length);
     } catch (error) {
       console.error('Error fetching comments:', error);
       toast({
@@ -278,6 +268,7 @@ export default function ImagePage() {
       // Add the new comment to the list
       const data = await response.json();
       setComments([...comments, data.comment]);
+      setCommentCount(commentCount + 1);
       setNewComment(''); // Clear input
       
       toast({
@@ -515,7 +506,7 @@ export default function ImagePage() {
                 <div className="flex-1 flex flex-col overflow-hidden">
                   <h3 className="text-sm font-semibold mb-3 flex items-center gap-1">
                     <MessageSquare className="h-4 w-4 text-purple-500" />
-                    Comments <span className="text-gray-500 dark:text-gray-400">({comments.length})</span>
+                    Comments <span className="text-gray-500 dark:text-gray-400">({commentCount})</span>
                   </h3>
                   
                   {/* Comments List */}
@@ -547,6 +538,16 @@ export default function ImagePage() {
                         <p className="text-sm">No comments yet. Be the first to comment!</p>
                       </div>
                     )}
+                    {!isLoadingComments && comments.length < commentCount && (
+                      <Button
+                        variant="ghost"
+                        size="sm"
+                        className="w-full text-purple-600 dark:text-purple-400"
+                        onClick={fetchComments}
+                      >
+                        Show all {commentCount} comments
+                      </Button>
+                    )}
                   </div>
                   
                   {/* Comment Form */}